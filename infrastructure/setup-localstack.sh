@@ -35,16 +35,35 @@ awslocal dynamodb create-table \
         AttributeName=image_id,AttributeType=S \
         AttributeName=created_at,AttributeType=S \
         AttributeName=user_id,AttributeType=S \
-        AttributeName=tags,AttributeType=S \
+        AttributeName=content_hash,AttributeType=S \
     --key-schema \
         AttributeName=image_id,KeyType=HASH \
         AttributeName=created_at,KeyType=RANGE \
     --global-secondary-indexes \
         'IndexName=UserIndex,KeySchema=[{AttributeName=user_id,KeyType=HASH},{AttributeName=created_at,KeyType=RANGE}],Projection={ProjectionType=ALL},ProvisionedThroughput={ReadCapacityUnits=5,WriteCapacityUnits=5}' \
-        'IndexName=TagsIndex,KeySchema=[{AttributeName=tags,KeyType=HASH},{AttributeName=created_at,KeyType=RANGE}],Projection={ProjectionType=ALL},ProvisionedThroughput={ReadCapacityUnits=5,WriteCapacityUnits=5}' \
+        'IndexName=UserContentHashIndex,KeySchema=[{AttributeName=user_id,KeyType=HASH},{AttributeName=content_hash,KeyType=RANGE}],Projection={ProjectionType=INCLUDE,NonKeyAttributes=[is_deleted]},ProvisionedThroughput={ReadCapacityUnits=5,WriteCapacityUnits=5}' \
     --provisioned-throughput \
         ReadCapacityUnits=5,WriteCapacityUnits=5
 
+# Create DynamoDB table indexing images by tag
+echo "Creating DynamoDB tags table..."
+awslocal dynamodb create-table \
+    --table-name ImageTags-dev \
+    --attribute-definitions \
+        AttributeName=tag,AttributeType=S \
+        AttributeName=sort_key,AttributeType=S \
+    --key-schema \
+        AttributeName=tag,KeyType=HASH \
+        AttributeName=sort_key,KeyType=RANGE \
+    --provisioned-throughput \
+        ReadCapacityUnits=5,WriteCapacityUnits=5
+
+# Create SQS queue for background permanent deletion
+echo "Creating SQS queue..."
+awslocal sqs create-queue \
+    --queue-name image-permanent-delete-dev \
+    --attributes VisibilityTimeout=360
+
 # Create IAM role for Lambda functions
 echo "Creating IAM role for Lambda..."
 awslocal iam create-role \
@@ -88,6 +107,8 @@ awslocal iam put-role-policy \
                 "Effect": "Allow",
                 "Action": [
                     "dynamodb:PutItem",
+                    "dynamodb:BatchWriteItem",
+                    "dynamodb:BatchGetItem",
                     "dynamodb:GetItem",
                     "dynamodb:UpdateItem",
                     "dynamodb:DeleteItem",
@@ -96,8 +117,19 @@ awslocal iam put-role-policy \
                 ],
                 "Resource": [
                     "arn:aws:dynamodb:us-east-1:000000000000:table/ImageMetadata-dev",
-                    "arn:aws:dynamodb:us-east-1:000000000000:table/ImageMetadata-dev/index/*"
+                    "arn:aws:dynamodb:us-east-1:000000000000:table/ImageMetadata-dev/index/*",
+                    "arn:aws:dynamodb:us-east-1:000000000000:table/ImageTags-dev"
                 ]
+            },
+            {
+                "Effect": "Allow",
+                "Action": [
+                    "sqs:SendMessage",
+                    "sqs:ReceiveMessage",
+                    "sqs:DeleteMessage",
+                    "sqs:GetQueueAttributes"
+                ],
+                "Resource": "arn:aws:sqs:us-east-1:000000000000:image-permanent-delete-dev"
             }
         ]
     }'
@@ -105,4 +137,6 @@ awslocal iam put-role-policy \
 echo "LocalStack setup completed successfully!"
 echo "Services available at: http://localhost:4566"
 echo "S3 bucket: instagram-images-dev"
-echo "DynamoDB table: ImageMetadata-dev"
\ No newline at end of file
+echo "DynamoDB table: ImageMetadata-dev"
+echo "DynamoDB tags table: ImageTags-dev"
+echo "SQS queue: image-permanent-delete-dev"
\ No newline at end of file
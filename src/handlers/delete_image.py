@@ -1,56 +1,48 @@
-from fastapi import FastAPI, Path, HTTPException, Header
-from mangum import Mangum
+from fastapi import APIRouter, Path, HTTPException, Header, Depends
+import asyncio
 import logging
-from typing import Optional
+from src.handlers.dependencies import provide_image_service
 from src.services.image_service import ImageService
+from src.handlers.errors import http_error
 from src.models.image_model import DeleteResponse
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Image Delete Service", description="Delete images", version="1.0.0"
-)
+router = APIRouter(tags=["Images"])
 
-image_service = ImageService()
 
-
-@app.delete("/images/{image_id}", response_model=DeleteResponse)
+@router.delete("/images/{image_id}", response_model=DeleteResponse)
 async def delete_image(
     image_id: str = Path(..., description="Unique image identifier"),
     x_user_id: str = Header(..., description="User ID from authentication header"),
+    image_service: ImageService = Depends(provide_image_service),
 ):
     """Delete an image (soft delete)"""
     try:
-        result = image_service.delete_image(image_id=image_id, user_id=x_user_id)
+        result = await asyncio.to_thread(
+            image_service.delete_image, image_id=image_id, user_id=x_user_id
+        )
 
         if not result["success"]:
-            if "not found" in result["error"].lower():
-                raise HTTPException(status_code=404, detail=result["error"])
-            elif "unauthorized" in result["error"].lower():
-                raise HTTPException(status_code=403, detail=result["error"])
-            elif "already deleted" in result["error"].lower():
-                raise HTTPException(status_code=410, detail=result["error"])  # Gone
-            else:
-                raise HTTPException(status_code=400, detail=result["error"])
+            raise http_error(result)
 
         return DeleteResponse(message=result["message"], image_id=result["image_id"])
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in delete_image: {str(e)}")
+        logger.error("Unexpected error in delete_image: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.delete("/images/{image_id}/permanent")
+@router.delete("/images/{image_id}/permanent")
 async def permanently_delete_image(
     image_id: str = Path(..., description="Unique image identifier"),
     x_user_id: str = Header(..., description="User ID from authentication header"),
     confirmation: str = Header(
         ..., description="Must be 'PERMANENT_DELETE' to confirm"
     ),
+    image_service: ImageService = Depends(provide_image_service),
 ):
     """Permanently delete an image (hard delete - removes from S3 and DynamoDB)"""
     try:
@@ -61,26 +53,26 @@ async def permanently_delete_image(
             )
 
         # First perform soft delete
-        result = image_service.delete_image(image_id=image_id, user_id=x_user_id)
+        result = await asyncio.to_thread(
+            image_service.delete_image, image_id=image_id, user_id=x_user_id
+        )
 
         if not result["success"]:
             # Handle cases where image might already be soft deleted
-            if "already deleted" not in result["error"].lower():
-                if "not found" in result["error"].lower():
-                    raise HTTPException(status_code=404, detail=result["error"])
-                elif "unauthorized" in result["error"].lower():
-                    raise HTTPException(status_code=403, detail=result["error"])
-                else:
-                    raise HTTPException(status_code=400, detail=result["error"])
-
-        # TODO: Implement permanent deletion from S3 and DynamoDB
-        # This would typically be done by a background job for safety
-        logger.info(
-            f"Permanent deletion requested for image {image_id} by user {x_user_id}"
+            if result.get("error_code") != "already_deleted":
+                raise http_error(result)
+
+        # Removal from S3 and DynamoDB happens in the background worker
+        queued = await asyncio.to_thread(
+            image_service.request_permanent_delete,
+            image_id=image_id,
+            user_id=x_user_id,
         )
+        if not queued["success"]:
+            raise http_error(queued)
 
         return {
-            "message": "Image marked for permanent deletion",
+            "message": queued["message"],
             "image_id": image_id,
             "note": "Permanent deletion will be processed by background job",
         }
@@ -88,15 +80,5 @@ async def permanently_delete_image(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in permanently_delete_image: {str(e)}")
+        logger.error("Unexpected error in permanently_delete_image: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
-
-
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "delete"}
-
-
-# Lambda handler
-handler = Mangum(app, lifespan="off")
@@ -0,0 +1,25 @@
+from fastapi import Depends
+from src.services.factory import get_cdn_client, get_image_service
+from src.services.image_service import ImageService
+from src.utils.cdn_client import CDNClient
+from src.utils.s3_client import S3Client
+
+# Route dependencies. They are async so FastAPI resolves them on the event
+# loop instead of dispatching each one to its threadpool.
+
+
+async def provide_image_service() -> ImageService:
+    """Shared ImageService for the container"""
+    return get_image_service()
+
+
+async def provide_s3_client(
+    image_service: ImageService = Depends(provide_image_service),
+) -> S3Client:
+    """S3 client of the shared service, reusing its connection pool"""
+    return image_service.s3_client
+
+
+async def provide_cdn_client() -> CDNClient:
+    """Shared CloudFront URL signer"""
+    return get_cdn_client()
@@ -0,0 +1,17 @@
+from fastapi import HTTPException
+from typing import Any, Dict
+
+# HTTP status for each ImageService error_code
+ERROR_STATUS_CODES = {
+    "not_found": 404,
+    "unauthorized": 403,
+    "already_deleted": 410,
+    "bad_request": 400,
+    "internal_error": 500,
+}
+
+
+def http_error(result: Dict[str, Any]) -> HTTPException:
+    """Build the HTTPException for a failed service result"""
+    status_code = ERROR_STATUS_CODES.get(result.get("error_code"), 400)
+    return HTTPException(status_code=status_code, detail=result["error"])
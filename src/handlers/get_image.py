@@ -1,78 +1,149 @@
-from fastapi import FastAPI, Path, HTTPException, Query
-from mangum import Mangum
+from fastapi import APIRouter, Depends, Header, Path, HTTPException, Query, Response
+import asyncio
+import hashlib
 import logging
-from typing import Optional
+from functools import lru_cache, partial
+from typing import Any, Dict, List, Optional, Tuple
+from src.handlers.dependencies import (
+    provide_cdn_client,
+    provide_image_service,
+    provide_s3_client,
+)
 from src.services.image_service import ImageService
+from src.utils.cdn_client import CDNClient
+from src.utils.s3_client import S3Client
+from src.handlers.errors import http_error
 from src.models.image_model import ImageResponse
+from src.utils.request_coalescer import RequestCoalescer
+from src.utils.batch_loader import BatchLoader
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Image Retrieval Service",
-    description="Get individual images and metadata",
-    version="1.0.0",
-)
+router = APIRouter(tags=["Images"])
+
+# Identical lookups that arrive while one is in flight share its result
+_image_lookups = RequestCoalescer()
+
+
+def _load_images(
+    image_service: ImageService, keys: List[Tuple[str, bool]]
+) -> Dict[Tuple[str, bool], Dict[str, Any]]:
+    """Resolve a batch of (image_id, include_url) lookups"""
+    results = {}
+    for include_url in (True, False):
+        image_ids = [image_id for image_id, flag in keys if flag == include_url]
+        if image_ids:
+            images = image_service.get_images(
+                image_ids, include_download_url=include_url
+            )
+            for image_id in image_ids:
+                results[(image_id, include_url)] = images[image_id]
+    return results
+
+
+@lru_cache(maxsize=1)
+def _image_loader(image_service: ImageService) -> BatchLoader:
+    """Batch loader bound to the given service, created once per service"""
+    return BatchLoader(partial(_load_images, image_service))
+
+
+async def provide_image_loader(
+    image_service: ImageService = Depends(provide_image_service),
+) -> BatchLoader:
+    """Concurrent lookups for different images are fetched from DynamoDB together"""
+    return _image_loader(image_service)
+
+
+def _etag(image: Dict[str, Any]) -> str:
+    """Weak ETag that changes whenever the image record is updated"""
+    version = image.get("updated_at") or image["created_at"]
+    digest = hashlib.blake2b(
+        f"{image['image_id']}:{version}".encode(), digest_size=8
+    ).hexdigest()
+    return f'W/"{digest}"'
+
 
-image_service = ImageService()
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
 
 
-@app.get("/images/{image_id}", response_model=ImageResponse)
+@router.get("/images/{image_id}", response_model=ImageResponse)
 async def get_image(
+    response: Response,
     image_id: str = Path(..., description="Unique image identifier"),
     include_url: bool = Query(
         default=True, description="Include download URL in response"
     ),
+    if_none_match: Optional[str] = Header(None),
+    image_loader: BatchLoader = Depends(provide_image_loader),
 ):
     """Get image metadata and download URL"""
     try:
-        result = image_service.get_image(
-            image_id=image_id, include_download_url=include_url
-        )
+        result = await image_loader.load((image_id, include_url))
 
         if not result["success"]:
-            if "not found" in result["error"].lower():
-                raise HTTPException(status_code=404, detail=result["error"])
-            else:
-                raise HTTPException(status_code=400, detail=result["error"])
+            raise http_error(result)
+
+        # Freshly presigned URLs differ per call, so only URL-less responses
+        # are cacheable by the client
+        if not include_url:
+            etag = _etag(result["image"])
+            if _etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            response.headers["ETag"] = etag
 
         return ImageResponse(**result["image"])
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_image: {str(e)}")
+        logger.error("Unexpected error in get_image: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.get("/images/{image_id}/download")
+@router.get("/images/{image_id}/download")
 async def get_image_download_url(
     image_id: str = Path(..., description="Unique image identifier"),
     expires_in: int = Query(
         default=3600, ge=60, le=86400, description="URL expiration time in seconds"
     ),
+    image_service: ImageService = Depends(provide_image_service),
+    s3_client: S3Client = Depends(provide_s3_client),
+    cdn_client: CDNClient = Depends(provide_cdn_client),
 ):
     """Get presigned download URL for image"""
     try:
         # First check if image exists
-        result = image_service.get_image(image_id=image_id, include_download_url=False)
+        result = await _image_lookups.run(
+            (image_id, False),
+            image_service.get_image,
+            image_id=image_id,
+            include_download_url=False,
+        )
 
         if not result["success"]:
-            if "not found" in result["error"].lower():
-                raise HTTPException(status_code=404, detail=result["error"])
-            else:
-                raise HTTPException(status_code=400, detail=result["error"])
+            raise http_error(result)
 
         image_data = result["image"]
 
-        # Generate presigned URL with custom expiration
-        from src.utils.s3_client import S3Client
-
-        s3_client = S3Client()
-        download_url = s3_client.generate_presigned_url(
-            key=image_data["s3_key"], expiration=expires_in
-        )
+        # Serve from CloudFront when configured, otherwise presign S3 directly
+        if cdn_client.enabled:
+            download_url = cdn_client.generate_signed_url(
+                key=image_data["s3_key"], expiration=expires_in
+            )
+        else:
+            download_url = s3_client.generate_presigned_url(
+                key=image_data["s3_key"], expiration=expires_in
+            )
 
         if not download_url:
             raise HTTPException(
@@ -90,42 +161,39 @@ async def get_image_download_url(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_image_download_url: {str(e)}")
+        logger.error("Unexpected error in get_image_download_url: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.get("/images/{image_id}/metadata")
+@router.get("/images/{image_id}/metadata")
 async def get_image_metadata(
-    image_id: str = Path(..., description="Unique image identifier")
+    response: Response,
+    image_id: str = Path(..., description="Unique image identifier"),
+    if_none_match: Optional[str] = Header(None),
+    image_service: ImageService = Depends(provide_image_service),
 ):
     """Get only image metadata without download URL"""
     try:
-        result = image_service.get_image(image_id=image_id, include_download_url=False)
+        # The service leaves s3_key out, so the result can be returned as is
+        result = await asyncio.to_thread(
+            image_service.get_image,
+            image_id=image_id,
+            include_download_url=False,
+            include_s3_key=False,
+        )
 
         if not result["success"]:
-            if "not found" in result["error"].lower():
-                raise HTTPException(status_code=404, detail=result["error"])
-            else:
-                raise HTTPException(status_code=400, detail=result["error"])
+            raise http_error(result)
 
-        # Remove s3_key from response for security
-        image_data = result["image"].copy()
-        image_data.pop("s3_key", None)
+        etag = _etag(result["image"])
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
 
-        return image_data
+        return result["image"]
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_image_metadata: {str(e)}")
+        logger.error("Unexpected error in get_image_metadata: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
-
-
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "get"}
-
-
-# Lambda handler
-handler = Mangum(app, lifespan="off")
@@ -1,30 +1,29 @@
-from fastapi import FastAPI, Query, HTTPException
-from fastapi.responses import JSONResponse
-from mangum import Mangum
+from fastapi import APIRouter, Query, Path, HTTPException, Depends
+import asyncio
 import logging
 from typing import Optional
+from src.handlers.dependencies import provide_image_service
+from src.handlers.errors import http_error
 from src.services.image_service import ImageService
 from src.models.image_model import ImageListResponse
-from src.utils.validators import QueryValidator
+from src.utils.validators import MetadataValidator
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Image List Service", description="List and search images", version="1.0.0"
-)
+router = APIRouter()
 
-image_service = ImageService()
+# Limits and page tokens are validated by FastAPI/pydantic-core; tokens are
+# base64 (standard or URL-safe alphabet) of bounded length
+PAGE_TOKEN_PATTERN = r"^[A-Za-z0-9+/=_-]{1,2048}$"
 
 
-@app.get("/images", response_model=ImageListResponse)
+@router.get("/images", response_model=ImageListResponse, tags=["Images"])
 async def list_images(
     limit: int = Query(
         default=20, ge=1, le=100, description="Number of images to return"
     ),
     page_token: Optional[str] = Query(
-        None, description="Pagination token for next page"
+        None, pattern=PAGE_TOKEN_PATTERN, description="Pagination token for next page"
     ),
     user_id: Optional[str] = Query(None, description="Filter by user ID"),
     tags: Optional[str] = Query(None, description="Filter by tag"),
@@ -34,36 +33,26 @@ async def list_images(
     end_date: Optional[str] = Query(
         None, description="Filter images created before this date (ISO format)"
     ),
+    image_service: ImageService = Depends(provide_image_service),
 ):
     """List images with optional filters"""
     try:
-        # Validate limit
-        limit_validation = QueryValidator.validate_limit(limit)
-        if not limit_validation["valid"]:
-            raise HTTPException(status_code=400, detail=limit_validation["error"])
-        validated_limit = limit_validation["value"]
-
-        # Validate page token
-        token_validation = QueryValidator.validate_last_evaluated_key(page_token)
-        if not token_validation["valid"]:
-            raise HTTPException(status_code=400, detail=token_validation["error"])
-        validated_token = token_validation["value"]
-
         # Parse tags if provided (support comma-separated tags)
         parsed_tags = None
         if tags:
-            parsed_tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+            parsed_tags = MetadataValidator.parse_tags(tags)
 
         # Get images
-        result = image_service.list_images(
-            limit=validated_limit,
-            page_token=validated_token,
+        result = await asyncio.to_thread(
+            image_service.list_images,
+            limit=limit,
+            page_token=page_token,
             user_id=user_id,
             tags=parsed_tags,
         )
 
         if not result["success"]:
-            raise HTTPException(status_code=400, detail=result["error"])
+            raise http_error(result)
 
         return ImageListResponse(
             images=result["images"],
@@ -75,24 +64,29 @@ async def list_images(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in list_images: {str(e)}")
+        logger.error("Unexpected error in list_images: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.get("/images/user/{user_id}")
+@router.get("/users/{user_id}/images", response_model=ImageListResponse, tags=["Users"])
 async def list_user_images(
-    user_id: str,
+    user_id: str = Path(..., description="User ID"),
     limit: int = Query(default=20, ge=1, le=100),
-    page_token: Optional[str] = Query(None),
+    page_token: Optional[str] = Query(None, pattern=PAGE_TOKEN_PATTERN),
+    image_service: ImageService = Depends(provide_image_service),
 ):
     """List images for a specific user"""
     try:
-        result = image_service.list_images(
-            limit=limit, page_token=page_token, user_id=user_id
+        result = await asyncio.to_thread(
+            image_service.list_images,
+            limit=limit,
+            page_token=page_token,
+            user_id=user_id,
+            tags=None,
         )
 
         if not result["success"]:
-            raise HTTPException(status_code=400, detail=result["error"])
+            raise http_error(result)
 
         return ImageListResponse(
             images=result["images"],
@@ -104,22 +98,28 @@ async def list_user_images(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in list_user_images: {str(e)}")
+        logger.error("Unexpected error in list_user_images: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.get("/images/tags/{tag}")
+@router.get("/tags/{tag}/images", response_model=ImageListResponse, tags=["Tags"])
 async def list_images_by_tag(
-    tag: str,
+    tag: str = Path(..., description="Tag name"),
     limit: int = Query(default=20, ge=1, le=100),
-    page_token: Optional[str] = Query(None),
+    page_token: Optional[str] = Query(None, pattern=PAGE_TOKEN_PATTERN),
+    image_service: ImageService = Depends(provide_image_service),
 ):
     """List images with a specific tag"""
     try:
-        result = image_service.list_images(limit=limit, page_token=page_token, tags=[tag] if tag else None)
+        result = await asyncio.to_thread(
+            image_service.list_images,
+            limit=limit,
+            page_token=page_token,
+            tags=[tag] if tag else None,
+        )
 
         if not result["success"]:
-            raise HTTPException(status_code=400, detail=result["error"])
+            raise http_error(result)
 
         return ImageListResponse(
             images=result["images"],
@@ -131,15 +131,5 @@ async def list_images_by_tag(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in list_images_by_tag: {str(e)}")
+        logger.error("Unexpected error in list_images_by_tag: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
-
-
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "list"}
-
-
-# Lambda handler
-handler = Mangum(app, lifespan="off")
@@ -0,0 +1,44 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List
+from src.services.factory import get_image_service
+
+# This Lambda does not import src.main, so configure logging the same way here
+logging.basicConfig()
+logging.getLogger().setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
+image_service = get_image_service()
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, List[Dict[str, str]]]:
+    """Permanently delete images queued by DELETE /images/{image_id}/permanent
+
+    Processes a whole SQS batch at once and reports only the messages whose
+    images failed to delete, so the rest of the batch is not retried.
+    """
+    requests: Dict[str, str] = {}
+    message_ids: Dict[str, List[str]] = {}
+    for record in event.get("Records", []):
+        try:
+            body = json.loads(record["body"])
+            image_id = body["image_id"]
+            requests[image_id] = body["user_id"]
+        except (KeyError, TypeError, ValueError) as e:
+            # A malformed message will never succeed; drop it instead of retrying
+            logger.error(
+                "Skipping malformed message %s: %s", record.get("messageId"), e
+            )
+            continue
+        message_ids.setdefault(image_id, []).append(record["messageId"])
+
+    failed = image_service.purge_deleted_images(requests) if requests else []
+
+    return {
+        "batchItemFailures": [
+            {"itemIdentifier": message_id}
+            for image_id in failed
+            for message_id in message_ids[image_id]
+        ]
+    }
@@ -1,32 +1,26 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends
-from fastapi.responses import JSONResponse
-from mangum import Mangum
-import json
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
+import asyncio
 import logging
-from typing import Optional, List
+from typing import Optional
+from src.handlers.dependencies import provide_image_service
+from src.handlers.errors import http_error
 from src.services.image_service import ImageService
-from src.models.image_model import ImageUploadRequest, UploadResponse, ErrorResponse
+from src.models.image_model import ImageUploadRequest, UploadResponse
+from src.utils.validators import MetadataValidator
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Image Upload Service",
-    description="Upload images with metadata",
-    version="1.0.0",
-)
+router = APIRouter(tags=["Images"])
 
-image_service = ImageService()
 
-
-@app.post("/upload", response_model=UploadResponse)
+@router.post("/images", response_model=UploadResponse)
 async def upload_image(
     file: UploadFile = File(..., description="Image file to upload"),
     title: Optional[str] = Form(None, description="Image title"),
     description: Optional[str] = Form(None, description="Image description"),
     tags: Optional[str] = Form(None, description="Comma-separated tags"),
     user_id: str = Form(..., description="User ID"),
+    image_service: ImageService = Depends(provide_image_service),
 ):
     """Upload an image with metadata"""
     try:
@@ -34,13 +28,10 @@ async def upload_image(
         if not file.content_type or not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="File must be an image")
 
-        # Read file content
-        file_content = await file.read()
-
         # Parse tags
         parsed_tags = None
         if tags:
-            parsed_tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+            parsed_tags = MetadataValidator.parse_tags(tags)
 
         # Create upload request
         upload_request = ImageUploadRequest(
@@ -48,29 +39,24 @@ async def upload_image(
         )
 
         # Upload image
-        result = image_service.upload_image(
-            file_content=file_content,
+        result = await asyncio.to_thread(
+            image_service.upload_image_stream,
+            file_stream=file.file,
             filename=file.filename or "unknown.jpg",
             upload_request=upload_request,
         )
 
         if not result["success"]:
-            raise HTTPException(status_code=400, detail=result["error"])
+            raise http_error(result)
 
-        return UploadResponse(message=result["message"], image_id=result["image_id"])
+        return UploadResponse(
+            message=result["message"],
+            image_id=result["image_id"],
+            duplicate=result.get("duplicate", False),
+        )
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in upload: {str(e)}")
+        logger.error("Unexpected error in upload: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
-
-
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "upload"}
-
-
-# Lambda handler
-handler = Mangum(app, lifespan="off")
@@ -1,7 +1,7 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-import uuid
+import os
 
 
 class ImageUploadRequest(BaseModel):
@@ -11,12 +11,13 @@ class ImageUploadRequest(BaseModel):
     description: Optional[str] = Field(
         None, max_length=1000, description="Image description"
     )
-    tags: Optional[List[str]] = Field(None, max_items=10, description="Image tags")
+    tags: Optional[List[str]] = Field(None, max_length=10, description="Image tags")
     user_id: str = Field(
         ..., min_length=1, description="User ID who uploaded the image"
     )
 
-    @validator("tags")
+    @field_validator("tags")
+    @classmethod
     def validate_tags(cls, v):
         if v is not None:
             for tag in v:
@@ -30,6 +31,8 @@ class ImageUploadRequest(BaseModel):
 class ImageMetadata(BaseModel):
     """Image metadata model for DynamoDB"""
 
+    model_config = ConfigDict(extra="ignore")
+
     image_id: str = Field(..., description="Unique image identifier")
     created_at: str = Field(..., description="ISO timestamp of creation")
     user_id: str = Field(..., description="User ID who uploaded the image")
@@ -45,6 +48,10 @@ class ImageMetadata(BaseModel):
     s3_key: str = Field(..., description="S3 object key")
     is_deleted: bool = Field(default=False, description="Soft delete flag")
     updated_at: Optional[str] = Field(None, description="ISO timestamp of last update")
+    content_hash: Optional[str] = Field(None, description="SHA-256 of the file content")
+    perceptual_hash: Optional[str] = Field(
+        None, description="Average hash of the image pixels"
+    )
 
     @classmethod
     def create_new(
@@ -56,18 +63,20 @@ class ImageMetadata(BaseModel):
         width: int,
         height: int,
         format: str,
+        content_hash: Optional[str] = None,
+        perceptual_hash: Optional[str] = None,
     ) -> "ImageMetadata":
         """Create new image metadata instance"""
-        image_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        image_id = _uuid4_str()
+        # One clock read so created_at and the S3 date path always agree
+        now = datetime.utcnow()
 
         # Generate S3 key with organized structure
-        date_path = datetime.utcnow().strftime("%Y/%m")
-        s3_key = f"images/{date_path}/{image_id}.{format.lower()}"
+        s3_key = f"images/{now.year}/{now.month:02d}/{image_id}.{format.lower()}"
 
         return cls(
             image_id=image_id,
-            created_at=now,
+            created_at=now.isoformat(),
             user_id=upload_request.user_id,
             title=upload_request.title,
             description=upload_request.description,
@@ -79,12 +88,16 @@ class ImageMetadata(BaseModel):
             height=height,
             format=format,
             s3_key=s3_key,
+            content_hash=content_hash,
+            perceptual_hash=perceptual_hash,
         )
 
 
 class ImageResponse(BaseModel):
     """Response model for image data"""
 
+    model_config = ConfigDict(extra="ignore")
+
     image_id: str
     created_at: str
     user_id: str
@@ -97,6 +110,7 @@ class ImageResponse(BaseModel):
     width: int
     height: int
     format: str
+    updated_at: Optional[str] = None
     download_url: Optional[str] = None
     thumbnail_url: Optional[str] = None
 
@@ -133,6 +147,9 @@ class UploadResponse(BaseModel):
     message: str
     image_id: str
     upload_url: Optional[str] = None
+    # True when identical content was already stored; the request's title,
+    # description and tags were not applied to the existing image
+    duplicate: bool = False
 
 
 class ErrorResponse(BaseModel):
@@ -148,3 +165,12 @@ class DeleteResponse(BaseModel):
 
     message: str
     image_id: str
+
+
+def _uuid4_str() -> str:
+    """Random RFC 4122 version 4 UUID string, same as str(uuid.uuid4())"""
+    raw = bytearray(os.urandom(16))
+    raw[6] = (raw[6] & 0x0F) | 0x40  # version 4
+    raw[8] = (raw[8] & 0x3F) | 0x80  # RFC 4122 variant
+    hex_id = raw.hex()
+    return f"{hex_id[:8]}-{hex_id[8:12]}-{hex_id[12:16]}-{hex_id[16:20]}-{hex_id[20:]}"
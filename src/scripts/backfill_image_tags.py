@@ -0,0 +1,44 @@
+"""Index existing images in the tags table
+
+Images uploaded before the tags table existed have no tag rows, so they are
+missing from tag listings until this runs once per environment:
+
+    python -m src.scripts.backfill_image_tags
+
+Tag rows are keyed by tag and created_at#image_id, so rerunning it only
+rewrites the same rows.
+"""
+
+import logging
+import os
+from src.utils.dynamodb_client import DynamoDBClient
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_image_tags(dynamodb_client: DynamoDBClient) -> int:
+    """Write tag rows for every live tagged image; returns the images indexed"""
+    indexed = 0
+    last_evaluated_key = None
+    while True:
+        page = dynamodb_client.scan_tagged_images(last_evaluated_key)
+        for item in page["items"]:
+            tags = [tag for tag in map(str.strip, item["tags"].split(",")) if tag]
+            if not tags:
+                continue
+            if not dynamodb_client.put_image_tags(
+                item["image_id"], item["created_at"], tags
+            ):
+                raise RuntimeError(f"Failed to index tags for {item['image_id']}")
+            indexed += 1
+
+        last_evaluated_key = page["last_evaluated_key"]
+        if not last_evaluated_key:
+            return indexed
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    logging.getLogger().setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    count = backfill_image_tags(DynamoDBClient())
+    logger.info("Indexed tags for %d images", count)
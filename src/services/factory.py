@@ -0,0 +1,27 @@
+from functools import lru_cache
+from botocore.config import Config
+from src.services.image_service import ImageService
+from src.utils.cdn_client import CDNClient
+
+# boto3 defaults to a 10-connection pool, which concurrent requests exhaust;
+# short timeouts with adaptive retries keep a slow AWS call from pinning a
+# request for the default 60 seconds
+AWS_CLIENT_CONFIG = Config(
+    max_pool_connections=100,
+    tcp_keepalive=True,
+    connect_timeout=1,
+    read_timeout=3,
+    retries={"max_attempts": 2, "mode": "adaptive"},
+)
+
+
+@lru_cache(maxsize=1)
+def get_image_service() -> ImageService:
+    """The process-wide ImageService, created on first use"""
+    return ImageService(config=AWS_CLIENT_CONFIG)
+
+
+@lru_cache(maxsize=1)
+def get_cdn_client() -> CDNClient:
+    """The process-wide CloudFront URL signer, created on first use"""
+    return CDNClient()
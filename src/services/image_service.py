@@ -1,10 +1,18 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, BinaryIO, Callable, Union
 import uuid
 import base64
-import json
+import io
+import orjson
+import os
+import sys
 from datetime import datetime
+from botocore.config import Config
+from pydantic import TypeAdapter
+from src.utils.cache import TTLCache
+from src.utils.image_hash import average_hash, content_sha256
 from src.utils.s3_client import S3Client
 from src.utils.dynamodb_client import DynamoDBClient
+from src.utils.sqs_client import SQSClient
 from src.utils.validators import ImageValidator, MetadataValidator
 from src.models.image_model import (
     ImageMetadata,
@@ -16,102 +24,247 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Built once; validating a page as a list costs a single pydantic-core call
+_IMAGE_LIST_ADAPTER = TypeAdapter(List[ImageResponse])
+
 
 class ImageService:
-    def __init__(self):
-        self.s3_client = S3Client()
-        self.dynamodb_client = DynamoDBClient()
+    def __init__(self, config: Optional[Config] = None):
+        # config is applied to every AWS client (pooling, timeouts, retries)
+        self.s3_client = S3Client(config=config)
+        self.dynamodb_client = DynamoDBClient(config=config)
+        self.sqs_client = SQSClient(config=config)
+
+        # Opt-in read caches; cached results are shared and must not be mutated.
+        # Writes only invalidate the container that served them, so other
+        # containers can return deleted or stale images for up to the TTL.
+        cache_ttl = float(os.getenv("CACHE_TTL_SECONDS", "0"))
+        cache_size = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+        self._image_cache = TTLCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+        self._list_cache = TTLCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+
+    def _invalidate_image(self, image_id: str) -> None:
+        """Drop cached reads affected by a change to the given image"""
+        self._image_cache.delete_where(lambda key: key[0] == image_id)
+        self._list_cache.clear()
 
     def _convert_dynamo_to_api_format(
         self, dynamo_data: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Convert DynamoDB data format to API format"""
         api_data = dynamo_data.copy()
-        # Convert tags string back to list
-        if api_data.get("tags") and isinstance(api_data["tags"], str):
-            if api_data["tags"].strip():
-                api_data["tags"] = [
-                    tag.strip() for tag in api_data["tags"].split(",") if tag.strip()
-                ]
-            else:
-                api_data["tags"] = []
+        # Convert tags string back to list (stored as "" when there are none).
+        # The same tags recur across a page, so rows share interned strings
+        tags = api_data.get("tags")
+        if isinstance(tags, str):
+            api_data["tags"] = [
+                sys.intern(tag) for tag in map(str.strip, tags.split(",")) if tag
+            ]
+        # DynamoDB returns numbers as Decimal
+        for field in ("file_size", "width", "height"):
+            if field in api_data:
+                api_data[field] = int(api_data[field])
         return api_data
 
+    def _convert_metadata_to_dynamo_format(
+        self, metadata: ImageMetadata
+    ) -> Dict[str, Any]:
+        """Convert new image metadata to a DynamoDB item
+
+        Built field by field rather than with model_dump, which is the bulk
+        of the cost on this path. Tags are stored as a comma-separated
+        string, which scans filter on with contains().
+        """
+        return {
+            "image_id": metadata.image_id,
+            "created_at": metadata.created_at,
+            "user_id": metadata.user_id,
+            "title": metadata.title,
+            "description": metadata.description,
+            "tags": ",".join(metadata.tags) if metadata.tags else "",
+            "file_name": metadata.file_name,
+            "file_size": metadata.file_size,
+            "content_type": metadata.content_type,
+            "width": metadata.width,
+            "height": metadata.height,
+            "format": metadata.format,
+            "s3_key": metadata.s3_key,
+            "is_deleted": metadata.is_deleted,
+            "updated_at": metadata.updated_at,
+            "content_hash": metadata.content_hash,
+            "perceptual_hash": metadata.perceptual_hash,
+        }
+
     def upload_image(
         self, file_content: bytes, filename: str, upload_request: ImageUploadRequest
     ) -> Dict[str, Any]:
         """Upload image and store metadata"""
+        return self._upload(
+            file_content,
+            filename,
+            upload_request,
+            lambda key, content_type: self.s3_client.upload_image(
+                file_content=file_content, key=key, content_type=content_type
+            ),
+        )
+
+    def upload_image_stream(
+        self,
+        file_stream: BinaryIO,
+        filename: str,
+        upload_request: ImageUploadRequest,
+    ) -> Dict[str, Any]:
+        """Upload image from a seekable file-like object and store metadata
+
+        The stream is validated from its header and then streamed to S3, so
+        the image is never held in memory as a whole.
+        """
+
+        def store(key: str, content_type: str) -> bool:
+            file_stream.seek(0)
+            return self.s3_client.upload_image_stream(
+                file_stream, key=key, content_type=content_type
+            )
+
+        return self._upload(file_stream, filename, upload_request, store)
+
+    def _upload(
+        self,
+        source: Union[bytes, BinaryIO],
+        filename: str,
+        upload_request: ImageUploadRequest,
+        store: Callable[[str, str], bool],
+    ) -> Dict[str, Any]:
+        """Validate an image, store it with store(key, content_type) and save metadata"""
         try:
+            if isinstance(source, (bytes, bytearray)):
+                file_size = len(source)
+            else:
+                source.seek(0, io.SEEK_END)
+                file_size = source.tell()
+                source.seek(0)
+
             # Validate file extension
             if not ImageValidator.validate_file_extension(filename):
                 return {
                     "success": False,
                     "error": "Invalid file extension. Allowed: jpg, jpeg, png, gif, webp",
+                    "error_code": "bad_request",
                 }
 
             # Validate file size
-            if not ImageValidator.validate_file_size(len(file_content)):
+            if not ImageValidator.validate_file_size(file_size):
                 return {
                     "success": False,
                     "error": f"File size must be between 1KB and 10MB",
+                    "error_code": "bad_request",
                 }
 
             # Validate image content and extract metadata
-            image_validation = ImageValidator.validate_image_content(file_content)
+            image_validation = ImageValidator.validate_image_content(source)
             if not image_validation["valid"]:
-                return {"success": False, "error": image_validation["error"]}
+                return {
+                    "success": False,
+                    "error": image_validation["error"],
+                    "error_code": "bad_request",
+                }
 
             # Validate metadata
             title_validation = MetadataValidator.validate_title(upload_request.title)
-            if not title_validation["valid"]:
-                return {"success": False, "error": title_validation["error"]}
+            if not title_validation.valid:
+                return {
+                    "success": False,
+                    "error": title_validation.error,
+                    "error_code": "bad_request",
+                }
 
             desc_validation = MetadataValidator.validate_description(
                 upload_request.description
             )
-            if not desc_validation["valid"]:
-                return {"success": False, "error": desc_validation["error"]}
+            if not desc_validation.valid:
+                return {
+                    "success": False,
+                    "error": desc_validation.error,
+                    "error_code": "bad_request",
+                }
 
             tags_validation = MetadataValidator.validate_tags(upload_request.tags)
-            if not tags_validation["valid"]:
-                return {"success": False, "error": tags_validation["error"]}
+            if not tags_validation.valid:
+                return {
+                    "success": False,
+                    "error": tags_validation.error,
+                    "error_code": "bad_request",
+                }
 
             user_validation = MetadataValidator.validate_user_id(upload_request.user_id)
-            if not user_validation["valid"]:
-                return {"success": False, "error": user_validation["error"]}
+            if not user_validation.valid:
+                return {
+                    "success": False,
+                    "error": user_validation.error,
+                    "error_code": "bad_request",
+                }
+
+            # Skip storing a byte-identical image the user already uploaded. The
+            # existing image keeps its metadata; callers see duplicate=True
+            content_hash = content_sha256(source)
+            existing = self.dynamodb_client.find_image_by_content_hash(
+                upload_request.user_id, content_hash
+            )
+            if existing:
+                return {
+                    "success": True,
+                    "image_id": existing["image_id"],
+                    "message": "Image already uploaded",
+                    "duplicate": True,
+                }
 
             # Create image metadata
             image_metadata = ImageMetadata.create_new(
                 upload_request=upload_request,
                 file_name=filename,
-                file_size=len(file_content),
+                file_size=file_size,
                 content_type=f"image/{image_validation['format']}",
                 width=image_validation["width"],
                 height=image_validation["height"],
                 format=image_validation["format"],
+                content_hash=content_hash,
+                perceptual_hash=average_hash(image_validation["image"]),
             )
 
             # Upload to S3
-            if not self.s3_client.upload_image(
-                file_content=file_content,
-                key=image_metadata.s3_key,
-                content_type=image_metadata.content_type,
-            ):
-                return {"success": False, "error": "Failed to upload image to storage"}
+            if not store(image_metadata.s3_key, image_metadata.content_type):
+                return {
+                    "success": False,
+                    "error": "Failed to upload image to storage",
+                    "error_code": "internal_error",
+                }
 
             # Store metadata in DynamoDB
-            # Convert data for DynamoDB storage (tags as string for GSI)
-            dynamo_data = image_metadata.model_dump()
-            if dynamo_data.get("tags"):
-                # Convert tags list to comma-separated string for DynamoDB GSI
-                dynamo_data["tags"] = ",".join(dynamo_data["tags"])
-            else:
-                dynamo_data["tags"] = ""
+            dynamo_data = self._convert_metadata_to_dynamo_format(image_metadata)
+
+            # Tag rows go in first; until the metadata record exists they
+            # point at nothing and are skipped by tag listings
+            if image_metadata.tags and not self.dynamodb_client.put_image_tags(
+                image_metadata.image_id, image_metadata.created_at, image_metadata.tags
+            ):
+                self._rollback_upload(image_metadata)
+                return {
+                    "success": False,
+                    "error": "Failed to store image metadata",
+                    "error_code": "internal_error",
+                }
 
             if not self.dynamodb_client.put_image_metadata(dynamo_data):
-                # Rollback S3 upload if DynamoDB fails
-                self.s3_client.delete_image(image_metadata.s3_key)
-                return {"success": False, "error": "Failed to store image metadata"}
+                # Rollback the tag rows and S3 upload if DynamoDB fails
+                self._rollback_upload(image_metadata)
+                return {
+                    "success": False,
+                    "error": "Failed to store image metadata",
+                    "error_code": "internal_error",
+                }
+
+            # New image must show up in listings
+            self._list_cache.clear()
 
             return {
                 "success": True,
@@ -120,44 +273,140 @@ class ImageService:
             }
 
         except Exception as e:
-            logger.error(f"Error uploading image: {str(e)}")
-            return {"success": False, "error": "Internal server error during upload"}
+            logger.error("Error uploading image: %s", e)
+            return {
+                "success": False,
+                "error": "Internal server error during upload",
+                "error_code": "internal_error",
+            }
+
+    def _rollback_upload(self, image_metadata: ImageMetadata) -> None:
+        """Remove the object and any tag rows of an upload whose record failed"""
+        if image_metadata.tags:
+            # Tag writes are batched, so a failed batch may have written some
+            self.dynamodb_client.delete_image_tags(
+                [
+                    {
+                        "image_id": image_metadata.image_id,
+                        "created_at": image_metadata.created_at,
+                        "tags": image_metadata.tags,
+                    }
+                ]
+            )
+        self.s3_client.delete_image(image_metadata.s3_key)
+
+    def _build_image_result(
+        self,
+        metadata: Optional[Dict[str, Any]],
+        include_download_url: bool,
+        include_s3_key: bool = True,
+    ) -> Dict[str, Any]:
+        """Turn a metadata record into a get_image result and cache it"""
+        if not metadata:
+            return {
+                "success": False,
+                "error": "Image not found",
+                "error_code": "not_found",
+            }
+
+        # Check if image is deleted
+        if metadata.get("is_deleted", False):
+            return {
+                "success": False,
+                "error": "Image not found",
+                "error_code": "not_found",
+            }
+
+        # Convert DynamoDB format to API format
+        api_metadata = self._convert_dynamo_to_api_format(metadata)
+
+        # Generate download URL if requested
+        if include_download_url:
+            download_url = self.s3_client.generate_presigned_url(metadata["s3_key"])
+            if download_url:
+                api_metadata["download_url"] = download_url
+
+        # Create response without re-validating data we wrote ourselves; the
+        # stored record always carries every ImageResponse field (see tests)
+        response_data = ImageResponse.model_construct(**api_metadata).model_dump()
+        if include_s3_key:
+            # Include s3_key in the response for internal use
+            response_data["s3_key"] = metadata["s3_key"]
+
+        result = {"success": True, "image": response_data}
+        self._image_cache.set(
+            (metadata["image_id"], include_download_url, include_s3_key), result
+        )
+        return result
 
     def get_image(
-        self, image_id: str, include_download_url: bool = True
+        self,
+        image_id: str,
+        include_download_url: bool = True,
+        include_s3_key: bool = True,
     ) -> Dict[str, Any]:
         """Get image metadata and optionally generate download URL"""
+        cached = self._image_cache.get((image_id, include_download_url, include_s3_key))
+        if cached is not None:
+            return cached
+
         try:
             # Get metadata from DynamoDB
             metadata = self.dynamodb_client.get_image_metadata_by_id(image_id)
-            if not metadata:
-                return {"success": False, "error": "Image not found"}
-
-            # Check if image is deleted
-            if metadata.get("is_deleted", False):
-                return {"success": False, "error": "Image not found"}
-
-            # Convert DynamoDB format to API format
-            api_metadata = self._convert_dynamo_to_api_format(metadata)
+            return self._build_image_result(
+                metadata, include_download_url, include_s3_key
+            )
 
-            # Create response
-            image_response = ImageResponse(**api_metadata)
+        except Exception as e:
+            logger.error("Error getting image %s: %s", image_id, e)
+            return {
+                "success": False,
+                "error": "Internal server error",
+                "error_code": "internal_error",
+            }
 
-            # Generate download URL if requested
-            if include_download_url:
-                download_url = self.s3_client.generate_presigned_url(metadata["s3_key"])
-                if download_url:
-                    image_response.download_url = download_url
+    def get_images(
+        self, image_ids: List[str], include_download_url: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get several images at once, keyed by image ID
+
+        Cache misses are fetched from DynamoDB in a single batch. Each value
+        has the same shape as a get_image result.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for image_id in image_ids:
+            cached = self._image_cache.get((image_id, include_download_url, True))
+            if cached is not None:
+                results[image_id] = cached
+            else:
+                missing.append(image_id)
 
-            # Include s3_key in the response for internal use
-            response_data = image_response.model_dump()
-            response_data["s3_key"] = metadata["s3_key"]
+        if not missing:
+            return results
 
-            return {"success": True, "image": response_data}
+        metadata_by_id = self.dynamodb_client.get_images_metadata_by_ids(missing)
+        for image_id in missing:
+            if metadata_by_id is None:
+                results[image_id] = {
+                    "success": False,
+                    "error": "Internal server error",
+                    "error_code": "internal_error",
+                }
+                continue
+            try:
+                results[image_id] = self._build_image_result(
+                    metadata_by_id.get(image_id), include_download_url
+                )
+            except Exception as e:
+                logger.error("Error getting image %s: %s", image_id, e)
+                results[image_id] = {
+                    "success": False,
+                    "error": "Internal server error",
+                    "error_code": "internal_error",
+                }
 
-        except Exception as e:
-            logger.error(f"Error getting image {image_id}: {str(e)}")
-            return {"success": False, "error": "Internal server error"}
+        return results
 
     def list_images(
         self,
@@ -167,16 +416,23 @@ class ImageService:
         tags: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """List images with optional filters"""
+        cache_key = (limit, page_token, user_id, tuple(tags) if tags else None)
+        cached = self._list_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             last_evaluated_key = None
             if page_token:
                 try:
                     # In production, you'd want to encrypt/sign this token
-                    last_evaluated_key = json.loads(
-                        base64.b64decode(page_token).decode()
-                    )
+                    last_evaluated_key = _decode_page_token(page_token)
                 except Exception:
-                    return {"success": False, "error": "Invalid page token"}
+                    return {
+                        "success": False,
+                        "error": "Invalid page token",
+                        "error_code": "bad_request",
+                    }
 
             # Query images based on filters
             if user_id and not tags:
@@ -184,8 +440,13 @@ class ImageService:
                 result = self.dynamodb_client.query_images_by_user(
                     user_id=user_id, limit=limit, last_evaluated_key=last_evaluated_key
                 )
+            elif tags and len(tags) == 1 and not user_id:
+                # Single-tag listings read the tags table instead of scanning
+                result = self.dynamodb_client.query_images_by_tag(
+                    tag=tags[0], limit=limit, last_evaluated_key=last_evaluated_key
+                )
             else:
-                # Use scan with filter for tag searches or combined user+tag filters
+                # Use scan with filter for multi-tag searches or combined user+tag filters
                 result = self.dynamodb_client.list_images(
                     limit=limit,
                     last_evaluated_key=last_evaluated_key,
@@ -193,57 +454,76 @@ class ImageService:
                     tags=tags,
                 )
 
-            # Filter out deleted images
-            active_images = [
-                img for img in result["items"] if not img.get("is_deleted", False)
-            ]
-
-            # Convert to response format
-            image_responses = []
-            for img in active_images:
+            # Filter out deleted images and convert the rest to API format
+            rows = []
+            for img in result["items"]:
+                if img.get("is_deleted", False):
+                    continue
                 # Convert DynamoDB format to API format
                 api_img = self._convert_dynamo_to_api_format(img)
-                image_response = ImageResponse(**api_img)
                 # Generate download URL
                 download_url = self.s3_client.generate_presigned_url(img["s3_key"])
                 if download_url:
-                    image_response.download_url = download_url
-                image_responses.append(image_response)
+                    api_img["download_url"] = download_url
+                rows.append(api_img)
+
+            # Validate and serialize the whole page in one pydantic-core call
+            images = _IMAGE_LIST_ADAPTER.dump_python(
+                _IMAGE_LIST_ADAPTER.validate_python(rows)
+            )
 
             # Generate next page token
             next_page_token = None
             if result["last_evaluated_key"]:
-                next_page_token = base64.b64encode(
-                    json.dumps(result["last_evaluated_key"]).encode()
-                ).decode()
+                next_page_token = _encode_page_token(result["last_evaluated_key"])
 
-            return {
+            list_result = {
                 "success": True,
-                "images": [img.model_dump() for img in image_responses],
-                "total_count": len(image_responses),
+                "images": images,
+                "total_count": len(images),
                 "next_page_token": next_page_token,
                 "has_more": result["last_evaluated_key"] is not None,
             }
+            self._list_cache.set(cache_key, list_result)
+            return list_result
 
         except Exception as e:
-            logger.error(f"Error listing images: {str(e)}")
-            return {"success": False, "error": "Internal server error"}
+            logger.error("Error listing images: %s", e)
+            return {
+                "success": False,
+                "error": "Internal server error",
+                "error_code": "internal_error",
+            }
 
     def delete_image(self, image_id: str, user_id: str) -> Dict[str, Any]:
         """Delete image (soft delete)"""
         try:
-            # Get image metadata
-            metadata = self.dynamodb_client.get_image_metadata_by_id(image_id)
+            # Ownership and deletion state must come from DynamoDB, not a cache
+            metadata = self.dynamodb_client.get_image_metadata_by_id(
+                image_id, consistent=True
+            )
             if not metadata:
-                return {"success": False, "error": "Image not found"}
+                return {
+                    "success": False,
+                    "error": "Image not found",
+                    "error_code": "not_found",
+                }
 
             # Check if user owns the image
             if metadata.get("user_id") != user_id:
-                return {"success": False, "error": "Unauthorized to delete this image"}
+                return {
+                    "success": False,
+                    "error": "Unauthorized to delete this image",
+                    "error_code": "unauthorized",
+                }
 
             # Check if already deleted
             if metadata.get("is_deleted", False):
-                return {"success": False, "error": "Image already deleted"}
+                return {
+                    "success": False,
+                    "error": "Image already deleted",
+                    "error_code": "already_deleted",
+                }
 
             # Soft delete - update metadata
             updates = {"is_deleted": True, "updated_at": datetime.utcnow().isoformat()}
@@ -251,7 +531,13 @@ class ImageService:
             if not self.dynamodb_client.update_image_metadata(
                 image_id=image_id, created_at=metadata["created_at"], updates=updates
             ):
-                return {"success": False, "error": "Failed to delete image"}
+                return {
+                    "success": False,
+                    "error": "Failed to delete image",
+                    "error_code": "internal_error",
+                }
+
+            self._invalidate_image(image_id)
 
             # Optional: Delete from S3 immediately or schedule for later cleanup
             # For now, we'll keep the S3 object for potential recovery
@@ -263,5 +549,98 @@ class ImageService:
             }
 
         except Exception as e:
-            logger.error(f"Error deleting image {image_id}: {str(e)}")
-            return {"success": False, "error": "Internal server error"}
+            logger.error("Error deleting image %s: %s", image_id, e)
+            return {
+                "success": False,
+                "error": "Internal server error",
+                "error_code": "internal_error",
+            }
+
+    def request_permanent_delete(self, image_id: str, user_id: str) -> Dict[str, Any]:
+        """Queue a soft-deleted image for removal from S3 and DynamoDB"""
+        if not self.sqs_client.enqueue_permanent_delete(image_id, user_id):
+            return {
+                "success": False,
+                "error": "Failed to schedule permanent deletion",
+                "error_code": "internal_error",
+            }
+
+        return {
+            "success": True,
+            "message": "Image marked for permanent deletion",
+            "image_id": image_id,
+        }
+
+    def purge_deleted_images(self, requests: Dict[str, str]) -> List[str]:
+        """Permanently delete soft-deleted images, given image_id -> user_id
+
+        Objects are removed with batched S3 DeleteObjects calls and records
+        with batched DynamoDB writes. Images that are missing (already
+        purged), not soft-deleted or not owned by the requesting user are
+        skipped. Returns the IDs that failed and should be retried.
+        """
+        # The soft delete that queued these requests happened moments ago; an
+        # eventually consistent read could miss it and drop the purge
+        metadata_by_id = self.dynamodb_client.get_images_metadata_by_ids(
+            list(requests), consistent=True
+        )
+        if metadata_by_id is None:
+            return list(requests)
+
+        to_purge = []
+        for image_id, user_id in requests.items():
+            metadata = metadata_by_id.get(image_id)
+            if not metadata:
+                continue
+            if (
+                not metadata.get("is_deleted", False)
+                or metadata.get("user_id") != user_id
+            ):
+                logger.warning(
+                    "Skipping permanent deletion of %s: not soft-deleted by its owner",
+                    image_id,
+                )
+                continue
+            to_purge.append(metadata)
+
+        failed_keys = set(
+            self.s3_client.delete_images([metadata["s3_key"] for metadata in to_purge])
+        )
+        failed = [m["image_id"] for m in to_purge if m["s3_key"] in failed_keys]
+
+        record_keys = [
+            {"image_id": m["image_id"], "created_at": m["created_at"]}
+            for m in to_purge
+            if m["s3_key"] not in failed_keys
+        ]
+        if record_keys and not self.dynamodb_client.delete_images_metadata(record_keys):
+            failed.extend(key["image_id"] for key in record_keys)
+            return failed
+
+        # Records are gone, so leftover tag rows would only be skipped;
+        # failing to remove them is logged rather than retried
+        tagged = [
+            {
+                "image_id": m["image_id"],
+                "created_at": m["created_at"],
+                "tags": self._convert_dynamo_to_api_format(m).get("tags") or [],
+            }
+            for m in to_purge
+            if m["s3_key"] not in failed_keys
+        ]
+        if any(image["tags"] for image in tagged):
+            self.dynamodb_client.delete_image_tags(tagged)
+
+        return failed
+
+
+def _encode_page_token(last_evaluated_key: Dict[str, Any]) -> str:
+    """URL-safe, unpadded base64 of the compact JSON key"""
+    raw = orjson.dumps(last_evaluated_key)
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode_page_token(page_token: str) -> Dict[str, Any]:
+    """Inverse of _encode_page_token; also accepts padded standard base64"""
+    padded = page_token + "=" * (-len(page_token) % 4)
+    return orjson.loads(base64.urlsafe_b64decode(padded))
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class BatchLoader:
+    """Collect concurrent single-key loads and resolve them in batches
+
+    Keys requested while no batch is running are flushed after
+    ``batch_window`` seconds (by default on the next event-loop iteration).
+    Keys requested while a batch is in flight queue up and go out together
+    in the next one, so batches grow with load without adding a fixed delay
+    to an idle service. ``batch_fn`` is synchronous, runs in a worker thread
+    and must return a dict mapping each requested key to its value.
+
+    Pending keys belong to the event loop that requested them. A loader
+    reused from a new loop (e.g. after ``asyncio.run`` returns) starts with
+    fresh state instead of waiting on futures from a closed loop.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Hashable]], Dict[Hashable, Any]],
+        max_batch_size: int = 100,
+        batch_window: float = 0.0,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def load(self, key: Hashable) -> Any:
+        """Load a single key as part of the next batch"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = {}
+            self._flush_task = None
+
+        future = self._pending.get(key)
+        if future is None:
+            future = loop.create_future()
+            self._pending[key] = future
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush(self._pending))
+
+        # Shield so a cancelled caller does not cancel the shared future
+        return await asyncio.shield(future)
+
+    async def _flush(self, pending: Dict[Hashable, asyncio.Future]) -> None:
+        await asyncio.sleep(self.batch_window)
+        while pending:
+            keys = list(pending)[: self.max_batch_size]
+            futures = {key: pending.pop(key) for key in keys}
+            try:
+                results = await asyncio.to_thread(self.batch_fn, keys)
+            except Exception as e:
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+                        # Mark as retrieved in case every caller went away
+                        future.exception()
+                continue
+
+            for key, future in futures.items():
+                if not future.done():
+                    future.set_result(results.get(key))
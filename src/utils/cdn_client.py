@@ -0,0 +1,78 @@
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import quote
+from botocore.signers import CloudFrontSigner
+from src.utils.cache import TTLCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Expiry times are rounded up to this many seconds so identical requests
+# within the same window get the same (cached) signed URL
+SIGNATURE_WINDOW_SECONDS = 60
+
+
+class CDNClient:
+    """Signs CloudFront download URLs when a distribution is configured"""
+
+    def __init__(self):
+        self.domain = os.getenv("CLOUDFRONT_DOMAIN")
+        self.key_pair_id = os.getenv("CLOUDFRONT_KEY_PAIR_ID")
+        private_key = os.getenv("CLOUDFRONT_PRIVATE_KEY")
+
+        self._signer = None
+        if self.domain and self.key_pair_id and private_key:
+            self._signer = CloudFrontSigner(
+                self.key_pair_id, _rsa_signer(private_key.replace("\\n", "\n"))
+            )
+
+        self._url_cache = TTLCache(
+            max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=SIGNATURE_WINDOW_SECONDS,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """CloudFront signing is used only when fully configured"""
+        return self._signer is not None
+
+    def generate_signed_url(self, key: str, expiration: int = 3600) -> Optional[str]:
+        """Generate a CloudFront signed URL valid for at least expiration seconds"""
+        if not self.enabled:
+            return None
+
+        expires_at = (
+            math.ceil((time.time() + expiration) / SIGNATURE_WINDOW_SECONDS)
+            * SIGNATURE_WINDOW_SECONDS
+        )
+        cache_key = (key, expires_at)
+        cached = self._url_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            url = self._signer.generate_presigned_url(
+                f"https://{self.domain}/{quote(key)}",
+                date_less_than=datetime.fromtimestamp(expires_at, tz=timezone.utc),
+            )
+        except Exception as e:
+            logger.error("Failed to sign CloudFront URL for %s: %s", key, e)
+            return None
+
+        self._url_cache.set(cache_key, url)
+        return url
+
+
+def _rsa_signer(private_key_pem: str):
+    """Build the RSA-SHA1 signing callable CloudFront expects"""
+    # Only needed when CloudFront is configured
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    private_key = serialization.load_pem_private_key(
+        private_key_pem.encode(), password=None
+    )
+    return lambda message: private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
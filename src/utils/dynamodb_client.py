@@ -1,16 +1,73 @@
 import boto3
 import os
 from typing import Dict, List, Optional, Any
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
 import logging
+import random
+import time
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Keep connections alive and pooled so warm Lambda invocations reuse them
+DYNAMODB_CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    retries={"mode": "standard"},
+)
+
+# DynamoDB limits the number of partition key values in a PartiQL IN clause
+MAX_PARTIQL_IN_VALUES = 50
+
+# DAX cannot run PartiQL, so ID lookups up to this size are served as
+# per-ID queries through DAX; larger batches use one PartiQL statement
+MAX_DAX_ID_QUERIES = 10
+
+# BatchGetItem accepts at most this many keys per request
+MAX_BATCH_GET_KEYS = 100
+
+# Unprocessed BatchGetItem keys are resent with capped exponential backoff
+# and full jitter, so a throttled table is not hammered
+BATCH_GET_MAX_ATTEMPTS = 5
+BATCH_GET_BASE_DELAY = 0.05
+
+# Attributes read by list queries: every ImageResponse field plus the ones
+# used to filter rows and presign URLs. Dedupe hashes are left out
+LIST_ATTRIBUTES = (
+    "image_id",
+    "created_at",
+    "user_id",
+    "title",
+    "description",
+    "tags",
+    "file_name",
+    "file_size",
+    "content_type",
+    "width",
+    "height",
+    "format",
+    "updated_at",
+    "s3_key",
+    "is_deleted",
+)
+# Placeholders for every name, since several are DynamoDB reserved words
+LIST_PROJECTION = ", ".join(f"#{name}" for name in LIST_ATTRIBUTES)
+LIST_ATTRIBUTE_NAMES = {f"#{name}": name for name in LIST_ATTRIBUTES}
+
+_deserializer = TypeDeserializer()
+
+# Key condition leaves are immutable, so build them once
+_IMAGE_ID_KEY = Key("image_id")
+_USER_ID_KEY = Key("user_id")
+_CONTENT_HASH_KEY = Key("content_hash")
+_TAG_KEY = Key("tag")
+
 
 class DynamoDBClient:
-    def __init__(self):
+    def __init__(self, config: Optional[Config] = None):
         self.table_name = os.getenv("DYNAMODB_TABLE_NAME", "ImageMetadata")
         self.endpoint_url = os.getenv("AWS_ENDPOINT_URL", "http://localhost:4566")
 
@@ -20,20 +77,54 @@ class DynamoDBClient:
             aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
             aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test"),
             region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+            config=(
+                DYNAMODB_CLIENT_CONFIG.merge(config)
+                if config
+                else DYNAMODB_CLIENT_CONFIG
+            ),
         )
 
         self.table = self.dynamodb.Table(self.table_name)
 
+        # One row per (tag, image) so tag listings are a Query, not a Scan
+        self.tags_table_name = os.getenv("DYNAMODB_TAGS_TABLE_NAME", "ImageTags")
+        self.tags_table = self.dynamodb.Table(self.tags_table_name)
+
+        # Serve user-facing GET and list reads from DAX when a cluster endpoint
+        # is configured. Writes go straight to DynamoDB and DAX never sees
+        # them, so DAX results can be stale for up to the cluster's item and
+        # query cache TTLs. Reads that decide ownership, deletion state or
+        # dedupe therefore use self.table, never read_table
+        self.dax_endpoint = os.getenv("DAX_ENDPOINT")
+        self.read_resource = self.dynamodb
+        if self.dax_endpoint:
+            from amazondax import AmazonDaxClient
+
+            self.read_resource = AmazonDaxClient.resource(
+                endpoint_url=self.dax_endpoint,
+                region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+            )
+        self.read_table = self.read_resource.Table(self.table_name)
+        self.read_tags_table = self.read_resource.Table(self.tags_table_name)
+
     def put_image_metadata(self, image_data: Dict[str, Any]) -> bool:
-        """Store image metadata in DynamoDB"""
+        """Store metadata for a new image; never overwrites an existing record"""
         try:
-            self.table.put_item(Item=image_data)
+            self.table.put_item(
+                Item=image_data,
+                ConditionExpression="attribute_not_exists(image_id)",
+            )
             logger.info(
-                f"Successfully stored metadata for image: {image_data.get('image_id')}"
+                "Successfully stored metadata for image: %s", image_data.get("image_id")
             )
             return True
         except ClientError as e:
-            logger.error(f"Failed to store image metadata: {str(e)}")
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                logger.error(
+                    "Metadata already exists for image: %s", image_data.get("image_id")
+                )
+            else:
+                logger.error("Failed to store image metadata: %s", e)
             return False
 
     def get_image_metadata(
@@ -41,24 +132,90 @@ class DynamoDBClient:
     ) -> Optional[Dict[str, Any]]:
         """Get image metadata by ID and creation timestamp"""
         try:
-            response = self.table.get_item(
+            response = self.read_table.get_item(
                 Key={"image_id": image_id, "created_at": created_at}
             )
             return response.get("Item")
         except ClientError as e:
-            logger.error(f"Failed to get image metadata for {image_id}: {str(e)}")
+            logger.error("Failed to get image metadata for %s: %s", image_id, e)
             return None
 
-    def get_image_metadata_by_id(self, image_id: str) -> Optional[Dict[str, Any]]:
-        """Get image metadata by ID only (queries all timestamps for this ID)"""
+    def get_image_metadata_by_id(
+        self, image_id: str, consistent: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Get image metadata by ID only (queries all timestamps for this ID)
+
+        With consistent=True the read bypasses DAX and is strongly
+        consistent; use it before acting on ownership or deletion state.
+        """
         try:
-            response = self.table.query(
-                KeyConditionExpression=Key("image_id").eq(image_id)
-            )
+            if consistent:
+                response = self.table.query(
+                    KeyConditionExpression=_IMAGE_ID_KEY.eq(image_id),
+                    ConsistentRead=True,
+                )
+            else:
+                response = self.read_table.query(
+                    KeyConditionExpression=_IMAGE_ID_KEY.eq(image_id)
+                )
             items = response.get("Items", [])
             return items[0] if items else None
         except ClientError as e:
-            logger.error(f"Failed to get image metadata for {image_id}: {str(e)}")
+            logger.error("Failed to get image metadata for %s: %s", image_id, e)
+            return None
+
+    def get_images_metadata_by_ids(
+        self, image_ids: List[str], consistent: bool = False
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Get metadata for several image IDs in as few round trips as possible
+
+        BatchGetItem needs the full primary key, so this uses a PartiQL
+        SELECT with an IN clause on the partition key instead. With DAX
+        configured, small batches are per-ID queries through DAX so they
+        hit its cache like single GETs do. Pass consistent=True when the
+        result decides deletion state, so a write made just before is
+        always seen. Returns None if the lookup fails.
+        """
+        client = self.dynamodb.meta.client
+        items: Dict[str, Dict[str, Any]] = {}
+        try:
+            if (
+                self.dax_endpoint
+                and not consistent
+                and len(image_ids) <= MAX_DAX_ID_QUERIES
+            ):
+                for image_id in image_ids:
+                    response = self.read_table.query(
+                        KeyConditionExpression=_IMAGE_ID_KEY.eq(image_id)
+                    )
+                    found = response.get("Items", [])
+                    if found:
+                        items[image_id] = found[0]
+                return items
+
+            for start in range(0, len(image_ids), MAX_PARTIQL_IN_VALUES):
+                chunk = image_ids[start : start + MAX_PARTIQL_IN_VALUES]
+                placeholders = ", ".join("?" for _ in chunk)
+                statement_kwargs = {
+                    "Statement": f'SELECT * FROM "{self.table_name}" '
+                    f"WHERE image_id IN [{placeholders}]",
+                    "Parameters": [{"S": image_id} for image_id in chunk],
+                    "ConsistentRead": consistent,
+                }
+                while True:
+                    response = client.execute_statement(**statement_kwargs)
+                    for raw_item in response.get("Items", []):
+                        item = {
+                            key: _deserializer.deserialize(value)
+                            for key, value in raw_item.items()
+                        }
+                        items.setdefault(item["image_id"], item)
+                    if not response.get("NextToken"):
+                        break
+                    statement_kwargs["NextToken"] = response["NextToken"]
+            return items
+        except ClientError as e:
+            logger.error("Failed to batch get image metadata: %s", e)
             return None
 
     def list_images(
@@ -70,42 +227,59 @@ class DynamoDBClient:
     ) -> Dict[str, Any]:
         """List images with optional filters"""
         try:
-            scan_kwargs = {"Limit": limit}
+            scan_kwargs = {
+                "Limit": limit,
+                "ProjectionExpression": LIST_PROJECTION,
+                "ExpressionAttributeNames": dict(LIST_ATTRIBUTE_NAMES),
+            }
 
             if last_evaluated_key:
                 scan_kwargs["ExclusiveStartKey"] = last_evaluated_key
 
+            # Plain expression strings skip boto3's condition builder, which
+            # would otherwise walk an expression tree on every page
             filter_expressions = []
+            attribute_names = scan_kwargs["ExpressionAttributeNames"]
+            attribute_values = {}
 
             if user_id:
-                filter_expressions.append(Attr("user_id").eq(user_id))
-
-            if tags and len(tags) > 0:
-                # Create OR condition for multiple tags (image matches if it has ANY of the specified tags)
-                if len(tags) == 1:
-                    filter_expressions.append(Attr("tags").contains(tags[0]))
-                else:
-                    # Multiple tags - create OR condition
-                    tag_filter = Attr("tags").contains(tags[0])
-                    for tag in tags[1:]:
-                        tag_filter = tag_filter | Attr("tags").contains(tag)
-                    filter_expressions.append(tag_filter)
+                filter_expressions.append("#user_id = :user_id")
+                attribute_names["#user_id"] = "user_id"
+                attribute_values[":user_id"] = user_id
+
+            if tags:
+                # Image matches if it has ANY of the specified tags. contains()
+                # on the comma-joined string also matches substrings ("cat" in
+                # "bobcat"), so it only narrows the scan; exact matches are
+                # picked out of the page below
+                attribute_names["#tags"] = "tags"
+                tag_conditions = []
+                for i, tag in enumerate(tags):
+                    tag_conditions.append(f"contains(#tags, :tag{i})")
+                    attribute_values[f":tag{i}"] = tag
+                filter_expressions.append(f"({' OR '.join(tag_conditions)})")
 
             if filter_expressions:
-                filter_expression = filter_expressions[0]
-                for expr in filter_expressions[1:]:
-                    filter_expression = filter_expression & expr
-                scan_kwargs["FilterExpression"] = filter_expression
+                scan_kwargs["FilterExpression"] = " AND ".join(filter_expressions)
+                scan_kwargs["ExpressionAttributeValues"] = attribute_values
 
-            response = self.table.scan(**scan_kwargs)
+            response = self.read_table.scan(**scan_kwargs)
+            items = response.get("Items", [])
+            if tags:
+                wanted = set(tags)
+                items = [
+                    item
+                    for item in items
+                    if wanted.intersection(map(str.strip, item["tags"].split(",")))
+                ]
 
             return {
-                "items": response.get("Items", []),
+                "items": items,
                 "last_evaluated_key": response.get("LastEvaluatedKey"),
-                "count": response.get("Count", 0),
+                "count": len(items),
             }
         except ClientError as e:
-            logger.error(f"Failed to list images: {str(e)}")
+            logger.error("Failed to list images: %s", e)
             return {"items": [], "last_evaluated_key": None, "count": 0}
 
     def query_images_by_user(
@@ -115,7 +289,9 @@ class DynamoDBClient:
         try:
             query_kwargs = {
                 "IndexName": "UserIndex",
-                "KeyConditionExpression": Key("user_id").eq(user_id),
+                "KeyConditionExpression": _USER_ID_KEY.eq(user_id),
+                "ProjectionExpression": LIST_PROJECTION,
+                "ExpressionAttributeNames": LIST_ATTRIBUTE_NAMES,
                 "Limit": limit,
                 "ScanIndexForward": False,  # Sort by created_at descending
             }
@@ -123,7 +299,7 @@ class DynamoDBClient:
             if last_evaluated_key:
                 query_kwargs["ExclusiveStartKey"] = last_evaluated_key
 
-            response = self.table.query(**query_kwargs)
+            response = self.read_table.query(**query_kwargs)
 
             return {
                 "items": response.get("Items", []),
@@ -131,17 +307,105 @@ class DynamoDBClient:
                 "count": response.get("Count", 0),
             }
         except ClientError as e:
-            logger.error(f"Failed to query images by user {user_id}: {str(e)}")
+            logger.error("Failed to query images by user %s: %s", user_id, e)
             return {"items": [], "last_evaluated_key": None, "count": 0}
 
-    def query_images_by_tags(
-        self, tags: str, limit: int = 20, last_evaluated_key: Optional[Dict] = None
+    def find_image_by_content_hash(
+        self, user_id: str, content_hash: str
+    ) -> Optional[Dict[str, Any]]:
+        """Find a live image the user already uploaded with the same content hash
+
+        Always reads DynamoDB, not DAX, so soft-deleted and purged images are
+        not reported from a stale cache. GSI queries cannot be strongly
+        consistent, so a change made moments ago may still be missed.
+        """
+        try:
+            response = self.table.query(
+                IndexName="UserContentHashIndex",
+                KeyConditionExpression=_USER_ID_KEY.eq(user_id)
+                & _CONTENT_HASH_KEY.eq(content_hash),
+            )
+            for item in response.get("Items", []):
+                if not item.get("is_deleted", False):
+                    return item
+            return None
+        except ClientError as e:
+            logger.error("Failed to look up content hash for user %s: %s", user_id, e)
+            return None
+
+    def put_image_tags(self, image_id: str, created_at: str, tags: List[str]) -> bool:
+        """Index an image under each of its tags"""
+        try:
+            with self.tags_table.batch_writer() as batch:
+                for tag in tags:
+                    batch.put_item(
+                        Item={
+                            "tag": tag,
+                            "sort_key": _tag_sort_key(created_at, image_id),
+                            "image_id": image_id,
+                            "created_at": created_at,
+                        }
+                    )
+            return True
+        except ClientError as e:
+            logger.error("Failed to store tags for image %s: %s", image_id, e)
+            return False
+
+    def delete_image_tags(self, images: List[Dict[str, Any]]) -> bool:
+        """Remove the tag rows of several images (image_id, created_at, tags)"""
+        try:
+            with self.tags_table.batch_writer() as batch:
+                for image in images:
+                    for tag in image["tags"]:
+                        batch.delete_item(
+                            Key={
+                                "tag": tag,
+                                "sort_key": _tag_sort_key(
+                                    image["created_at"], image["image_id"]
+                                ),
+                            }
+                        )
+            return True
+        except ClientError as e:
+            logger.error("Failed to batch delete image tags: %s", e)
+            return False
+
+    def scan_tagged_images(
+        self, last_evaluated_key: Optional[Dict] = None
     ) -> Dict[str, Any]:
-        """Query images by tags using GSI"""
+        """Scan one page of live images that have tags, for rebuilding tag rows
+
+        Reads DynamoDB directly (never DAX). Each item carries image_id,
+        created_at and the comma-separated tags string.
+        """
+        scan_kwargs = {
+            "ProjectionExpression": "#image_id, #created_at, #tags",
+            "FilterExpression": "#tags <> :empty AND "
+            "(attribute_not_exists(#is_deleted) OR #is_deleted = :false)",
+            "ExpressionAttributeNames": {
+                "#image_id": "image_id",
+                "#created_at": "created_at",
+                "#tags": "tags",
+                "#is_deleted": "is_deleted",
+            },
+            "ExpressionAttributeValues": {":empty": "", ":false": False},
+        }
+        if last_evaluated_key:
+            scan_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+        response = self.table.scan(**scan_kwargs)
+        return {
+            "items": response.get("Items", []),
+            "last_evaluated_key": response.get("LastEvaluatedKey"),
+        }
+
+    def query_images_by_tag(
+        self, tag: str, limit: int = 20, last_evaluated_key: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Query images with a tag, newest first, via the tags table"""
         try:
             query_kwargs = {
-                "IndexName": "TagsIndex",
-                "KeyConditionExpression": Key("tags").eq(tags),
+                "KeyConditionExpression": _TAG_KEY.eq(tag),
                 "Limit": limit,
                 "ScanIndexForward": False,  # Sort by created_at descending
             }
@@ -149,25 +413,82 @@ class DynamoDBClient:
             if last_evaluated_key:
                 query_kwargs["ExclusiveStartKey"] = last_evaluated_key
 
-            response = self.table.query(**query_kwargs)
+            response = self.read_tags_table.query(**query_kwargs)
+            keys = [
+                {"image_id": row["image_id"], "created_at": row["created_at"]}
+                for row in response.get("Items", [])
+            ]
+            items_by_id = self._batch_get_images(keys)
+            items = [
+                items_by_id[key["image_id"]]
+                for key in keys
+                if key["image_id"] in items_by_id
+            ]
 
             return {
-                "items": response.get("Items", []),
+                "items": items,
                 "last_evaluated_key": response.get("LastEvaluatedKey"),
-                "count": response.get("Count", 0),
+                "count": len(items),
             }
         except ClientError as e:
-            logger.error(f"Failed to query images by tags {tags}: {str(e)}")
+            logger.error("Failed to query images by tag %s: %s", tag, e)
             return {"items": [], "last_evaluated_key": None, "count": 0}
 
+    def _batch_get_images(
+        self, keys: List[Dict[str, str]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch metadata records by full primary key, keyed by image ID
+
+        Raises RuntimeError if keys are still unprocessed after
+        BATCH_GET_MAX_ATTEMPTS requests.
+        """
+        items: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(keys), MAX_BATCH_GET_KEYS):
+            request = {
+                self.table_name: {
+                    "Keys": keys[start : start + MAX_BATCH_GET_KEYS],
+                    "ProjectionExpression": LIST_PROJECTION,
+                    "ExpressionAttributeNames": LIST_ATTRIBUTE_NAMES,
+                }
+            }
+            for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+                if attempt:
+                    time.sleep(random.uniform(0, BATCH_GET_BASE_DELAY * 2**attempt))
+                response = self.read_resource.batch_get_item(RequestItems=request)
+                for item in response.get("Responses", {}).get(self.table_name, []):
+                    items[item["image_id"]] = item
+                request = response.get("UnprocessedKeys")
+                if not request:
+                    break
+            else:
+                raise RuntimeError(
+                    f"BatchGetItem left keys unprocessed after "
+                    f"{BATCH_GET_MAX_ATTEMPTS} attempts"
+                )
+        return items
+
     def delete_image_metadata(self, image_id: str, created_at: str) -> bool:
         """Delete image metadata"""
         try:
             self.table.delete_item(Key={"image_id": image_id, "created_at": created_at})
-            logger.info(f"Successfully deleted metadata for image: {image_id}")
+            logger.info("Successfully deleted metadata for image: %s", image_id)
+            return True
+        except ClientError as e:
+            logger.error("Failed to delete image metadata for %s: %s", image_id, e)
+            return False
+
+    def delete_images_metadata(self, keys: List[Dict[str, str]]) -> bool:
+        """Delete many metadata records (image_id + created_at keys) in batches"""
+        try:
+            # batch_writer groups deletes into BatchWriteItem calls of up to
+            # 25 items and resubmits unprocessed items
+            with self.table.batch_writer() as batch:
+                for key in keys:
+                    batch.delete_item(Key=key)
+            logger.info("Successfully deleted metadata for %d images", len(keys))
             return True
         except ClientError as e:
-            logger.error(f"Failed to delete image metadata for {image_id}: {str(e)}")
+            logger.error("Failed to batch delete image metadata: %s", e)
             return False
 
     def update_image_metadata(
@@ -189,8 +510,13 @@ class DynamoDBClient:
                 UpdateExpression=update_expression,
                 ExpressionAttributeValues=expression_attribute_values,
             )
-            logger.info(f"Successfully updated metadata for image: {image_id}")
+            logger.info("Successfully updated metadata for image: %s", image_id)
             return True
         except ClientError as e:
-            logger.error(f"Failed to update image metadata for {image_id}: {str(e)}")
+            logger.error("Failed to update image metadata for %s: %s", image_id, e)
             return False
+
+
+def _tag_sort_key(created_at: str, image_id: str) -> str:
+    """Tags table sort key: newest first by creation time, unique per image"""
+    return f"{created_at}#{image_id}"
@@ -0,0 +1,58 @@
+import hashlib
+import io
+from typing import BinaryIO, Union
+from PIL import Image
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def content_sha256(source: Union[bytes, BinaryIO]) -> str:
+    """Hex SHA-256 of raw bytes or of a seekable stream, read in chunks"""
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+
+    digest = hashlib.sha256()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+def average_hash(
+    source: Union[bytes, BinaryIO, Image.Image], hash_size: int = 8
+) -> str:
+    """Perceptual average hash as a hex string
+
+    Same algorithm as imagehash.average_hash: shrink to hash_size x
+    hash_size greyscale and set one bit per pixel brighter than the mean.
+    Visually identical images yield the same hash. An already opened,
+    not yet loaded PIL image can be passed to skip parsing the header
+    again; it is decoded at reduced scale and should not be reused.
+    """
+    if isinstance(source, Image.Image):
+        return _average_hash(source, hash_size)
+
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    stream.seek(0)
+    with Image.open(stream) as image:
+        digest = _average_hash(image, hash_size)
+
+    stream.seek(0)
+    return digest
+
+
+def _average_hash(image: Image.Image, hash_size: int) -> str:
+    # Let JPEG decode at reduced scale instead of full resolution
+    image.draft("L", (hash_size * 4, hash_size * 4))
+    pixels = list(
+        image.convert("L")
+        .resize((hash_size, hash_size), Image.Resampling.LANCZOS)
+        .getdata()
+    )
+
+    mean = sum(pixels) / len(pixels)
+    bits = 0
+    for pixel in pixels:
+        bits = (bits << 1) | (pixel > mean)
+    return f"{bits:0{hash_size * hash_size // 4}x}"
@@ -0,0 +1,36 @@
+import asyncio
+from functools import partial
+from typing import Any, Callable, Dict, Hashable
+
+
+class RequestCoalescer:
+    """Collapse identical concurrent calls into a single execution
+
+    The first caller for a key starts the function in a worker thread;
+    callers arriving while it is in flight await the same result instead of
+    issuing their own request. The call runs in its own task, so a cancelled
+    caller (the first one included) does not fail the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, func: Callable[..., Any], *args, **kwargs):
+        """Run func(*args, **kwargs) once per key among concurrent callers"""
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+        # A task left over from another (closed) event loop can never finish
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(asyncio.to_thread(func, *args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._finish, key))
+
+        # Shield so a cancelled caller does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark as retrieved in case every caller went away
+            task.exception()
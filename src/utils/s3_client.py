@@ -1,18 +1,58 @@
 import boto3
+import hashlib
+import hmac
 import os
-from typing import Optional, Dict, Any
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import quote, urlsplit
+from boto3.exceptions import S3UploadFailedError
+from typing import Optional, Dict, Any, BinaryIO, List
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from src.utils.cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Object key used to learn the URL layout botocore produces for presigns
+_PRESIGN_PROBE_KEY = "presign-probe"
+
+# Keep connections alive and pooled so warm Lambda invocations reuse them
+S3_CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    retries={"mode": "standard"},
+    signature_version="s3v4",
+)
+
+# Presigned URLs are signed as of the start of a window this many seconds
+# long, so identical requests within the window get the same (cached) URL
+PRESIGN_WINDOW_SECONDS = 600
+
+# SigV4 presigned URLs can be valid for at most seven days
+MAX_PRESIGN_EXPIRATION = 7 * 24 * 3600
+
+# S3 DeleteObjects accepts at most this many keys per request
+MAX_DELETE_OBJECTS = 1000
+
+# Stream uploads in 5MB parts so memory stays bounded by the chunk size
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=5 * 1024 * 1024,
+    multipart_chunksize=5 * 1024 * 1024,
+    use_threads=True,
+)
+
 
 class S3Client:
-    def __init__(self):
+    def __init__(self, config: Optional[Config] = None):
         self.bucket_name = os.getenv("S3_BUCKET_NAME", "instagram-images")
         self.endpoint_url = os.getenv("AWS_ENDPOINT_URL", "http://localhost:4566")
         # Public endpoint URL for presigned URLs (accessible from host machine)
-        self.public_endpoint_url = os.getenv("S3_PUBLIC_ENDPOINT_URL", "http://localhost:4566")
+        self.public_endpoint_url = os.getenv(
+            "S3_PUBLIC_ENDPOINT_URL", "http://localhost:4566"
+        )
 
         self.s3_client = boto3.client(
             "s3",
@@ -20,6 +60,15 @@ class S3Client:
             aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
             aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test"),
             region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+            config=S3_CLIENT_CONFIG.merge(config) if config else S3_CLIENT_CONFIG,
+        )
+        self.region = self.s3_client.meta.region_name
+
+        # (scheme://host, path prefix) for presigned GET URLs, learned lazily
+        self._presign_base = None
+        self._url_cache = TTLCache(
+            max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=PRESIGN_WINDOW_SECONDS,
         )
 
     def upload_image(
@@ -34,10 +83,28 @@ class S3Client:
                 ContentType=content_type,
                 ACL="public-read",
             )
-            logger.info(f"Successfully uploaded image: {key}")
+            logger.info("Successfully uploaded image: %s", key)
             return True
         except ClientError as e:
-            logger.error(f"Failed to upload image {key}: {str(e)}")
+            logger.error("Failed to upload image %s: %s", key, e)
+            return False
+
+    def upload_image_stream(
+        self, file_obj: BinaryIO, key: str, content_type: str = "image/jpeg"
+    ) -> bool:
+        """Stream image from a file-like object to S3 bucket"""
+        try:
+            self.s3_client.upload_fileobj(
+                file_obj,
+                self.bucket_name,
+                key,
+                ExtraArgs={"ContentType": content_type, "ACL": "public-read"},
+                Config=UPLOAD_TRANSFER_CONFIG,
+            )
+            logger.info("Successfully uploaded image: %s", key)
+            return True
+        except (ClientError, S3UploadFailedError) as e:
+            logger.error("Failed to upload image %s: %s", key, e)
             return False
 
     def get_image(self, key: str) -> Optional[bytes]:
@@ -46,36 +113,147 @@ class S3Client:
             response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
             return response["Body"].read()
         except ClientError as e:
-            logger.error(f"Failed to get image {key}: {str(e)}")
+            logger.error("Failed to get image %s: %s", key, e)
             return None
 
     def delete_image(self, key: str) -> bool:
         """Delete image from S3 bucket"""
         try:
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=key)
-            logger.info(f"Successfully deleted image: {key}")
+            logger.info("Successfully deleted image: %s", key)
             return True
         except ClientError as e:
-            logger.error(f"Failed to delete image {key}: {str(e)}")
+            logger.error("Failed to delete image %s: %s", key, e)
             return False
 
+    def delete_images(self, keys: List[str]) -> List[str]:
+        """Delete many images with batched DeleteObjects calls
+
+        Returns the keys that could not be deleted.
+        """
+        failed = []
+        for start in range(0, len(keys), MAX_DELETE_OBJECTS):
+            chunk = keys[start : start + MAX_DELETE_OBJECTS]
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in chunk], "Quiet": True},
+                )
+                for error in response.get("Errors", []):
+                    logger.error(
+                        "Failed to delete image %s: %s", error["Key"], error["Message"]
+                    )
+                    failed.append(error["Key"])
+            except ClientError as e:
+                logger.error("Failed to delete %d images: %s", len(chunk), e)
+                failed.extend(chunk)
+        return failed
+
     def generate_presigned_url(self, key: str, expiration: int = 3600) -> Optional[str]:
         """Generate presigned URL for image access"""
-        try:
-            url = self.s3_client.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": self.bucket_name, "Key": key},
-                ExpiresIn=expiration,
-            )
-
-            # Replace the endpoint URL with the public endpoint URL for external access
-            if self.endpoint_url != self.public_endpoint_url and url:
-                url = url.replace(self.endpoint_url, self.public_endpoint_url)
+        window_start = (
+            int(time.time() // PRESIGN_WINDOW_SECONDS) * PRESIGN_WINDOW_SECONDS
+        )
+        cache_key = (key, expiration, window_start)
+        cached = self._url_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
+        # Signing as of the window start and extending the lifetime by the
+        # window length keeps every URL valid for at least expiration seconds
+        url = None
+        if expiration + PRESIGN_WINDOW_SECONDS <= MAX_PRESIGN_EXPIRATION:
+            try:
+                url = self._fast_presign(
+                    key,
+                    expiration + PRESIGN_WINDOW_SECONDS,
+                    datetime.fromtimestamp(window_start, tz=timezone.utc),
+                )
+            except Exception as e:
+                logger.warning("Falling back to botocore presign for %s: %s", key, e)
+        if url:
+            self._url_cache.set(cache_key, url)
             return url
+
+        try:
+            return self._botocore_presign(key, expiration)
         except ClientError as e:
-            logger.error(f"Failed to generate presigned URL for {key}: {str(e)}")
+            logger.error("Failed to generate presigned URL for %s: %s", key, e)
+            return None
+
+    def _botocore_presign(self, key: str, expiration: int) -> Optional[str]:
+        """Presign a GET through botocore's request signer"""
+        url = self.s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket_name, "Key": key},
+            ExpiresIn=expiration,
+        )
+
+        # Replace the endpoint URL with the public endpoint URL for external access
+        if self.endpoint_url != self.public_endpoint_url and url:
+            url = url.replace(self.endpoint_url, self.public_endpoint_url)
+
+        return url
+
+    def _fast_presign(
+        self, key: str, expiration: int, signed_at: datetime
+    ) -> Optional[str]:
+        """Presign a GET with SigV4 computed directly, as of signed_at
+
+        Produces the same query-string signature as botocore without going
+        through its event system for every URL. The host and path layout are
+        taken from one botocore presign so addressing style and endpoint
+        handling stay botocore's. Returns None when no credentials are
+        available.
+        """
+        credentials = self.s3_client._get_credentials()
+        if credentials is None:
             return None
+        credentials = credentials.get_frozen_credentials()
+
+        if self._presign_base is None:
+            probe = urlsplit(self._botocore_presign(_PRESIGN_PROBE_KEY, 60))
+            prefix = probe.path[: -len(_PRESIGN_PROBE_KEY)]
+            self._presign_base = (f"{probe.scheme}://{probe.netloc}", prefix)
+        base, prefix = self._presign_base
+
+        amz_date = signed_at.strftime("%Y%m%dT%H%M%SZ")
+        date_stamp = amz_date[:8]
+        scope = f"{date_stamp}/{self.region}/s3/aws4_request"
+
+        params = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{credentials.access_key}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expiration),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if credentials.token:
+            params["X-Amz-Security-Token"] = credentials.token
+        query = "&".join(
+            f"{name}={quote(value, safe='-_.~')}" for name, value in params.items()
+        )
+        canonical_query = "&".join(
+            f"{name}={quote(value, safe='-_.~')}"
+            for name, value in sorted(params.items())
+        )
+
+        path = prefix + quote(key, safe="/~")
+        host = urlsplit(base).netloc
+        canonical_request = (
+            f"GET\n{path}\n{canonical_query}\nhost:{host}\n\nhost\nUNSIGNED-PAYLOAD"
+        )
+        string_to_sign = (
+            f"AWS4-HMAC-SHA256\n{amz_date}\n{scope}\n"
+            f"{hashlib.sha256(canonical_request.encode()).hexdigest()}"
+        )
+        signature = hmac.new(
+            _signing_key(credentials.secret_key, date_stamp, self.region),
+            string_to_sign.encode(),
+            hashlib.sha256,
+        ).hexdigest()
+
+        return f"{base}{path}?{query}&X-Amz-Signature={signature}"
 
     def generate_presigned_upload_url(
         self, key: str, expiration: int = 3600
@@ -87,7 +265,7 @@ class S3Client:
             )
             return response
         except ClientError as e:
-            logger.error(f"Failed to generate presigned upload URL for {key}: {str(e)}")
+            logger.error("Failed to generate presigned upload URL for %s: %s", key, e)
             return None
 
     def image_exists(self, key: str) -> bool:
@@ -97,3 +275,12 @@ class S3Client:
             return True
         except ClientError:
             return False
+
+
+@lru_cache(maxsize=2)
+def _signing_key(secret_key: str, date_stamp: str, region: str) -> bytes:
+    """Derive the SigV4 signing key, which only changes once a day"""
+    key = ("AWS4" + secret_key).encode()
+    for part in (date_stamp, region, "s3", "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    return key
@@ -0,0 +1,56 @@
+import boto3
+import json
+import os
+from datetime import datetime
+from functools import cached_property
+from typing import Optional
+from botocore.config import Config
+from botocore.exceptions import ClientError
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SQSClient:
+    def __init__(self, config: Optional[Config] = None):
+        self.permanent_delete_queue_url = os.getenv(
+            "PERMANENT_DELETE_QUEUE_URL",
+            "http://localhost:4566/000000000000/image-permanent-delete-dev",
+        )
+        self.endpoint_url = os.getenv("AWS_ENDPOINT_URL", "http://localhost:4566")
+        self._config = config
+
+    @cached_property
+    def sqs_client(self):
+        """SQS client, created on first use
+
+        Only permanent deletion sends messages, so most cold starts never
+        need to load the SQS service model.
+        """
+        return boto3.client(
+            "sqs",
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
+            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test"),
+            region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+            config=self._config,
+        )
+
+    def enqueue_permanent_delete(self, image_id: str, user_id: str) -> bool:
+        """Queue an image for permanent deletion by the background worker"""
+        try:
+            self.sqs_client.send_message(
+                QueueUrl=self.permanent_delete_queue_url,
+                MessageBody=json.dumps(
+                    {
+                        "image_id": image_id,
+                        "user_id": user_id,
+                        "requested_at": datetime.utcnow().isoformat(),
+                    }
+                ),
+            )
+            logger.info("Queued permanent deletion for image: %s", image_id)
+            return True
+        except ClientError as e:
+            logger.error("Failed to queue permanent deletion for %s: %s", image_id, e)
+            return False
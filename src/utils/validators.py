@@ -1,38 +1,95 @@
 import re
-from typing import List, Optional, Dict, Any
+import struct
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Dict, Any, BinaryIO, Tuple, Union
 from PIL import Image
 import io
 
+# Splits a comma-separated tag string and trims whitespace around each tag
+_TAG_SPLIT = re.compile(r"\s*,\s*")
+
+# Allowed user ID characters. \Z (unlike $) rejects a trailing newline
+_USER_ID_PATTERN = re.compile(r"^[a-zA-Z0-9\-_]+\Z")
+
+# Allowed tag characters, matched against all tags concatenated
+_TAG_CHARS = re.compile(r"[a-zA-Z0-9\s\-_]*")
+
+# Bytes of a stream read to find the image size. The JPEG SOF segment follows
+# any EXIF/ICC data, which is usually well under this
+_HEADER_SCAN_BYTES = 64 * 1024
+
+_PNG_SIZE = struct.Struct(">II")
+_JPEG_SIZE = struct.Struct(">HH")
+_JPEG_SEGMENT_LENGTH = struct.Struct(">H")
+# SOF0-SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class ValidationResult(NamedTuple):
+    """Outcome of a metadata or query check; value carries the normalized input"""
+
+    valid: bool
+    error: Optional[str] = None
+    value: Any = None
+
+
+_OK = ValidationResult(True)
+_DEFAULT_LIMIT = ValidationResult(True, value=20)
+_TITLE_EMPTY = ValidationResult(False, "Title cannot be empty")
+_TAGS_NOT_LIST = ValidationResult(False, "Tags must be a list")
+_TAG_NOT_STRING = ValidationResult(False, "Each tag must be a string")
+_TAG_EMPTY = ValidationResult(False, "Tags cannot be empty")
+_TAG_INVALID_CHARS = ValidationResult(
+    False, "Tags can only contain letters, numbers, spaces, hyphens, and underscores"
+)
+_USER_ID_MISSING = ValidationResult(False, "User ID is required")
+_USER_ID_NOT_STRING = ValidationResult(False, "User ID must be a string")
+_USER_ID_EMPTY = ValidationResult(False, "User ID cannot be empty")
+_USER_ID_INVALID_CHARS = ValidationResult(
+    False, "User ID can only contain letters, numbers, hyphens, and underscores"
+)
+_LIMIT_NOT_INTEGER = ValidationResult(False, "Limit must be a valid integer")
+
 
 class ImageValidator:
     """Validator for image uploads and metadata"""
 
-    ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp"}
-    ALLOWED_MIME_TYPES = {
-        "image/jpeg",
-        "image/jpg",
-        "image/png",
-        "image/gif",
-        "image/webp",
-    }
+    ALLOWED_EXTENSIONS = frozenset({"jpg", "jpeg", "png", "gif", "webp"})
+    ALLOWED_MIME_TYPES = frozenset(
+        {
+            "image/jpeg",
+            "image/jpg",
+            "image/png",
+            "image/gif",
+            "image/webp",
+        }
+    )
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     MIN_FILE_SIZE = 1024  # 1KB
     MAX_DIMENSION = 4000  # 4000px
     MIN_DIMENSION = 50  # 50px
+    _DIMENSIONS_ERROR = (
+        f"Image dimensions must be between {MIN_DIMENSION}px and {MAX_DIMENSION}px"
+    )
 
     @staticmethod
     def validate_file_extension(filename: str) -> bool:
         """Validate file extension"""
-        if not filename:
+        # Only the text after the last dot is lowercased; no dot, no extension
+        dot = filename.rfind(".") if filename else -1
+        if dot == -1:
             return False
 
-        extension = filename.lower().split(".")[-1]
-        return extension in ImageValidator.ALLOWED_EXTENSIONS
+        return filename[dot + 1 :].lower() in ImageValidator.ALLOWED_EXTENSIONS
 
     @staticmethod
     def validate_mime_type(mime_type: str) -> bool:
         """Validate MIME type"""
-        return mime_type.lower() in ImageValidator.ALLOWED_MIME_TYPES
+        # MIME types almost always arrive lowercase already
+        return (
+            mime_type in ImageValidator.ALLOWED_MIME_TYPES
+            or mime_type.lower() in ImageValidator.ALLOWED_MIME_TYPES
+        )
 
     @staticmethod
     def validate_file_size(file_size: int) -> bool:
@@ -40,24 +97,56 @@ class ImageValidator:
         return ImageValidator.MIN_FILE_SIZE <= file_size <= ImageValidator.MAX_FILE_SIZE
 
     @staticmethod
-    def validate_image_content(file_content: bytes) -> Dict[str, Any]:
-        """Validate image content and extract metadata"""
+    def validate_dimensions(width: int, height: int) -> bool:
+        """Validate image width and height"""
+        return (
+            ImageValidator.MIN_DIMENSION <= width <= ImageValidator.MAX_DIMENSION
+            and ImageValidator.MIN_DIMENSION <= height <= ImageValidator.MAX_DIMENSION
+        )
+
+    @staticmethod
+    def validate_image_content(file_content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+        """Validate image content and extract metadata
+
+        Accepts raw bytes or a seekable file-like object. Only the image
+        header is parsed and no pixels are decoded, so oversized images
+        (decompression bombs) are rejected on their declared dimensions.
+        On success the opened, unloaded PIL image is returned as "image"
+        so callers can reuse it instead of opening the file again.
+
+        Bytes are wrapped without copying. Streams are passed to PIL as is
+        and rewound to where they were, so they can be uploaded next
+        without another seek.
+        """
+        head = _peek(file_content, _HEADER_SCAN_BYTES)
+
+        # Reject anything that is not one of the allowed formats before PIL
+        image_format = _sniff_format(head)
+        if image_format is None:
+            return {"valid": False, "error": "Invalid image file: unrecognized format"}
+
+        # PNG and JPEG headers give the size directly, so out-of-range images
+        # are rejected without building a PIL image
+        dimensions = _header_dimensions(head, image_format)
+        if dimensions is not None and not ImageValidator.validate_dimensions(
+            *dimensions
+        ):
+            return {"valid": False, "error": ImageValidator._DIMENSIONS_ERROR}
+
+        if isinstance(file_content, (bytes, bytearray)):
+            # BytesIO shares the buffer of a bytes object instead of copying it
+            stream, position = io.BytesIO(file_content), None
+        else:
+            stream, position = file_content, file_content.tell()
+
         try:
-            image = Image.open(io.BytesIO(file_content))
+            image = Image.open(stream)
             width, height = image.size
             format_type = image.format.lower() if image.format else "unknown"
 
             # Validate dimensions
-            if (
-                width < ImageValidator.MIN_DIMENSION
-                or height < ImageValidator.MIN_DIMENSION
-                or width > ImageValidator.MAX_DIMENSION
-                or height > ImageValidator.MAX_DIMENSION
-            ):
-                return {
-                    "valid": False,
-                    "error": f"Image dimensions must be between {ImageValidator.MIN_DIMENSION}px and {ImageValidator.MAX_DIMENSION}px",
-                }
+            if not ImageValidator.validate_dimensions(width, height):
+                return {"valid": False, "error": ImageValidator._DIMENSIONS_ERROR}
 
             return {
                 "valid": True,
@@ -65,10 +154,69 @@ class ImageValidator:
                 "height": height,
                 "format": format_type,
                 "mode": image.mode,
+                "image": image,
             }
 
         except Exception as e:
             return {"valid": False, "error": f"Invalid image file: {str(e)}"}
+        finally:
+            if position is not None:
+                stream.seek(position)
+
+
+def _peek(file_content: Union[bytes, BinaryIO], size: int) -> bytes:
+    """Start of the file; streams are read from their position and put back"""
+    if isinstance(file_content, (bytes, bytearray)):
+        return file_content
+
+    position = file_content.tell()
+    head = file_content.read(size)
+    file_content.seek(position)
+    return head
+
+
+def _sniff_format(head: bytes) -> Optional[str]:
+    """Identify a JPEG, PNG, GIF or WebP file from its magic bytes"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _header_dimensions(head: bytes, image_format: str) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a PNG IHDR chunk or a JPEG SOF segment
+
+    Returns None for other formats, or when the header is malformed or not
+    within head, leaving the decision to PIL.
+    """
+    if image_format == "png":
+        if head[12:16] != b"IHDR" or len(head) < 24:
+            return None
+        return _PNG_SIZE.unpack_from(head, 16)
+
+    if image_format != "jpeg":
+        return None
+
+    # Walk the marker segments that follow the SOI marker
+    offset = 2
+    while offset + 9 <= len(head):
+        if head[offset] != 0xFF:
+            return None
+        marker = head[offset + 1]
+        if marker == 0xFF:
+            offset += 1  # Fill byte before a marker
+        elif marker in _JPEG_SOF_MARKERS:
+            height, width = _JPEG_SIZE.unpack_from(head, offset + 5)
+            return width, height
+        else:
+            (length,) = _JPEG_SEGMENT_LENGTH.unpack_from(head, offset + 2)
+            offset += 2 + length
+    return None
 
 
 class MetadataValidator:
@@ -80,93 +228,103 @@ class MetadataValidator:
     MAX_TAG_LENGTH = 50
 
     @staticmethod
-    def validate_title(title: Optional[str]) -> Dict[str, Any]:
+    def validate_title(title: Optional[str]) -> ValidationResult:
         """Validate image title"""
         if not title:
-            return {"valid": True}  # Title is optional
+            return _OK  # Title is optional
 
-        if len(title.strip()) == 0:
-            return {"valid": False, "error": "Title cannot be empty"}
+        if title.isspace():
+            return _TITLE_EMPTY
 
         if len(title) > MetadataValidator.MAX_TITLE_LENGTH:
-            return {
-                "valid": False,
-                "error": f"Title must be less than {MetadataValidator.MAX_TITLE_LENGTH} characters",
-            }
+            return ValidationResult(
+                False,
+                f"Title must be less than {MetadataValidator.MAX_TITLE_LENGTH} characters",
+            )
 
-        return {"valid": True}
+        return _OK
 
     @staticmethod
-    def validate_description(description: Optional[str]) -> Dict[str, Any]:
+    def validate_description(description: Optional[str]) -> ValidationResult:
         """Validate image description"""
         if not description:
-            return {"valid": True}  # Description is optional
+            return _OK  # Description is optional
 
         if len(description) > MetadataValidator.MAX_DESCRIPTION_LENGTH:
-            return {
-                "valid": False,
-                "error": f"Description must be less than {MetadataValidator.MAX_DESCRIPTION_LENGTH} characters",
-            }
+            return ValidationResult(
+                False,
+                f"Description must be less than {MetadataValidator.MAX_DESCRIPTION_LENGTH} characters",
+            )
 
-        return {"valid": True}
+        return _OK
 
     @staticmethod
-    def validate_tags(tags: Optional[List[str]]) -> Dict[str, Any]:
+    def validate_tags(tags: Optional[List[str]]) -> ValidationResult:
         """Validate image tags"""
         if not tags:
-            return {"valid": True}  # Tags are optional
+            return _OK  # Tags are optional
 
         if not isinstance(tags, list):
-            return {"valid": False, "error": "Tags must be a list"}
+            return _TAGS_NOT_LIST
 
         if len(tags) > MetadataValidator.MAX_TAGS_COUNT:
-            return {
-                "valid": False,
-                "error": f"Maximum {MetadataValidator.MAX_TAGS_COUNT} tags allowed",
-            }
+            return ValidationResult(
+                False, f"Maximum {MetadataValidator.MAX_TAGS_COUNT} tags allowed"
+            )
 
+        max_tag_length = MetadataValidator.MAX_TAG_LENGTH
         for tag in tags:
             if not isinstance(tag, str):
-                return {"valid": False, "error": "Each tag must be a string"}
+                return _TAG_NOT_STRING
 
-            if len(tag.strip()) == 0:
-                return {"valid": False, "error": "Tags cannot be empty"}
+            if not tag or tag.isspace():
+                return _TAG_EMPTY
 
-            if len(tag) > MetadataValidator.MAX_TAG_LENGTH:
-                return {
-                    "valid": False,
-                    "error": f"Each tag must be less than {MetadataValidator.MAX_TAG_LENGTH} characters",
-                }
+            if len(tag) > max_tag_length:
+                return ValidationResult(
+                    False, f"Each tag must be less than {max_tag_length} characters"
+                )
 
-            # Validate tag format (alphanumeric and basic punctuation)
-            if not re.match(r"^[a-zA-Z0-9\s\-_]+$", tag):
-                return {
-                    "valid": False,
-                    "error": "Tags can only contain letters, numbers, spaces, hyphens, and underscores",
-                }
+        # Validate tag format (alphanumeric and basic punctuation). Every tag is
+        # non-empty here, so one match over the concatenation checks them all
+        if _TAG_CHARS.fullmatch("".join(tags)) is None:
+            return _TAG_INVALID_CHARS
 
-        return {"valid": True}
+        return _OK
 
     @staticmethod
-    def validate_user_id(user_id: Optional[str]) -> Dict[str, Any]:
+    def parse_tags(tags: str) -> List[str]:
+        """Split a comma-separated tag string into trimmed, non-empty tags"""
+        if "," not in tags:
+            # Single tag: no split needed
+            tag = tags.strip()
+            return [tag] if tag else []
+
+        return [tag for tag in _TAG_SPLIT.split(tags.strip()) if tag]
+
+    @staticmethod
+    def validate_user_id(user_id: Optional[str]) -> ValidationResult:
         """Validate user ID"""
         if not user_id:
-            return {"valid": False, "error": "User ID is required"}
+            return _USER_ID_MISSING
 
         if not isinstance(user_id, str):
-            return {"valid": False, "error": "User ID must be a string"}
+            return _USER_ID_NOT_STRING
 
-        if len(user_id.strip()) == 0:
-            return {"valid": False, "error": "User ID cannot be empty"}
+        return _check_user_id(user_id)
 
-        # Basic format validation (can be extended based on requirements)
-        if not re.match(r"^[a-zA-Z0-9\-_]+$", user_id):
-            return {
-                "valid": False,
-                "error": "User ID can only contain letters, numbers, hyphens, and underscores",
-            }
 
-        return {"valid": True}
+@lru_cache(maxsize=1024)
+def _check_user_id(user_id: str) -> ValidationResult:
+    """Format checks for a user ID string, memoized since the same users recur"""
+    if user_id.isspace():
+        return _USER_ID_EMPTY
+
+    # Basic format validation (can be extended based on requirements)
+    if not _USER_ID_PATTERN.match(user_id):
+        return _USER_ID_INVALID_CHARS
+
+    return _OK
 
 
 class QueryValidator:
@@ -176,41 +334,42 @@ class QueryValidator:
     MIN_LIMIT = 1
 
     @staticmethod
-    def validate_limit(limit: Optional[int]) -> Dict[str, Any]:
+    def validate_limit(limit: Optional[int]) -> ValidationResult:
         """Validate pagination limit"""
         if limit is None:
-            return {"valid": True, "value": 20}  # Default limit
+            return _DEFAULT_LIMIT
 
-        try:
-            limit = int(limit)
-            if limit < QueryValidator.MIN_LIMIT:
-                return {
-                    "valid": False,
-                    "error": f"Limit must be at least {QueryValidator.MIN_LIMIT}",
-                }
-
-            if limit > QueryValidator.MAX_LIMIT:
-                return {
-                    "valid": False,
-                    "error": f"Limit cannot exceed {QueryValidator.MAX_LIMIT}",
-                }
-
-            return {"valid": True, "value": limit}
-        except (ValueError, TypeError):
-            return {"valid": False, "error": "Limit must be a valid integer"}
+        # FastAPI has usually converted the query parameter already
+        if type(limit) is not int:
+            try:
+                limit = int(limit)
+            except (ValueError, TypeError):
+                return _LIMIT_NOT_INTEGER
+
+        if QueryValidator.MIN_LIMIT <= limit <= QueryValidator.MAX_LIMIT:
+            return ValidationResult(True, value=limit)
+
+        if limit < QueryValidator.MIN_LIMIT:
+            return ValidationResult(
+                False, f"Limit must be at least {QueryValidator.MIN_LIMIT}"
+            )
+
+        return ValidationResult(
+            False, f"Limit cannot exceed {QueryValidator.MAX_LIMIT}"
+        )
 
     @staticmethod
-    def validate_last_evaluated_key(key: Optional[str]) -> Dict[str, Any]:
+    def validate_last_evaluated_key(key: Optional[str]) -> ValidationResult:
         """Validate pagination key"""
         if key is None:
-            return {"valid": True, "value": None}
+            return _OK
 
         try:
             # In a real implementation, you might want to decrypt/decode this key
             # For now, we'll just check if it's a non-empty string
-            if isinstance(key, str) and len(key.strip()) > 0:
-                return {"valid": True, "value": key}
+            if isinstance(key, str) and key and not key.isspace():
+                return ValidationResult(True, value=key)
             else:
-                return {"valid": False, "error": "Invalid pagination key"}
+                return ValidationResult(False, "Invalid pagination key")
         except Exception:
-            return {"valid": False, "error": "Invalid pagination key format"}
+            return ValidationResult(False, "Invalid pagination key format")
@@ -1,6 +1,9 @@
 import pytest
+import io
 import os
+from functools import lru_cache
 from unittest.mock import patch
+from PIL import Image
 
 
 @pytest.fixture(autouse=True)
@@ -19,8 +22,33 @@ def setup_test_environment():
         yield
 
 
+@pytest.fixture(scope="session", autouse=True)
+def load_image_plugins():
+    """Register Pillow's common format plugins before the first test uses them"""
+    Image.preinit()
+
+
 @pytest.fixture
 def mock_aws_services():
     """Mock AWS services for testing"""
     with patch("boto3.client") as mock_client, patch("boto3.resource") as mock_resource:
         yield {"client": mock_client, "resource": mock_resource}
+
+
+@lru_cache(maxsize=None)
+def _encode_image(size, color, format):
+    img_bytes = io.BytesIO()
+    Image.new("RGB", size, color=color).save(img_bytes, format=format)
+    return img_bytes.getvalue()
+
+
+@pytest.fixture(scope="session")
+def encoded_image():
+    """Solid RGB image bytes, encoded once per (size, color, format) per session"""
+    return _encode_image
+
+
+@pytest.fixture(scope="session")
+def sample_jpeg_bytes():
+    """200x200 JPEG encoded once per test session"""
+    return _encode_image((200, 200), "red", "JPEG")
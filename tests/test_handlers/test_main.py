@@ -1,25 +1,65 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, Mock
+from unittest.mock import Mock
 from src.main import app
+from src.handlers.dependencies import provide_image_service
 import io
-from PIL import Image
 
 
-@pytest.fixture
+# Service results shared by tests; the handlers only read them
+_IMAGE = {
+    "image_id": "test123",
+    "user_id": "user123",
+    "title": "Test Image",
+    "description": "Test description",
+    "tags": ["test", "sample"],
+    "created_at": "2023-01-01T00:00:00",
+    "file_name": "test.jpg",
+    "file_size": 12345,
+    "content_type": "image/jpeg",
+    "width": 200,
+    "height": 200,
+    "format": "jpeg",
+    "download_url": "https://example.com/image.jpg",
+}
+_STORED_IMAGE = {
+    "image_id": "test123",
+    "user_id": "user123",
+    "title": "Test Image",
+    "description": "Test description",
+    "tags": ["test", "sample"],
+    "created_at": "2023-01-01T00:00:00",
+    "updated_at": None,
+    "file_name": "test.jpg",
+    "s3_key": "images/test.jpg",
+    "content_type": "image/jpeg",
+    "width": 200,
+    "height": 200,
+    "format": "jpeg",
+    "file_size": 12345,
+}
+_EMPTY_LIST = {"success": True, "images": [], "total_count": 0, "has_more": False}
+
+
+@pytest.fixture(scope="module")
 def client():
-    """Create test client"""
+    """Create test client, shared by every test in the module"""
     return TestClient(app)
 
 
 @pytest.fixture
-def sample_image_file():
+def mock_service():
+    """Replace the shared ImageService with a mock for the duration of a test"""
+    service = Mock()
+    app.dependency_overrides[provide_image_service] = lambda: service
+    yield service
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def sample_image_file(sample_jpeg_bytes):
     """Create a sample image file for testing"""
-    img = Image.new("RGB", (200, 200), color="red")
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format="JPEG")
-    img_bytes.seek(0)
-    return ("test.jpg", img_bytes, "image/jpeg")
+    return ("test.jpg", io.BytesIO(sample_jpeg_bytes), "image/jpeg")
 
 
 class TestMainAPI:
@@ -33,11 +73,10 @@ class TestMainAPI:
         assert data["status"] == "healthy"
         assert data["service"] == "instagram-image-service"
 
-    @patch("src.main.image_service")
     def test_upload_image_success(self, mock_service, client, sample_image_file):
         """Test successful image upload"""
         # Mock service response
-        mock_service.upload_image.return_value = {
+        mock_service.upload_image_stream.return_value = {
             "success": True,
             "image_id": "test123",
             "message": "Image uploaded successfully",
@@ -61,6 +100,28 @@ class TestMainAPI:
         assert data["message"] == "Image uploaded successfully"
         assert data["image_id"] == "test123"
 
+    def test_upload_image_duplicate(self, mock_service, client, sample_image_file):
+        """Test a duplicate upload is reported as such"""
+        mock_service.upload_image_stream.return_value = {
+            "success": True,
+            "image_id": "existing-id",
+            "message": "Image already uploaded",
+            "duplicate": True,
+        }
+
+        filename, file_content, content_type = sample_image_file
+
+        response = client.post(
+            "/images",
+            files={"file": (filename, file_content, content_type)},
+            data={"user_id": "user123"},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["image_id"] == "existing-id"
+        assert data["duplicate"] is True
+
     def test_upload_image_invalid_file_type(self, client):
         """Test upload with invalid file type"""
         response = client.post(
@@ -75,11 +136,10 @@ class TestMainAPI:
             "detail", response_data.get("message", "")
         )
 
-    @patch("src.main.image_service")
     def test_upload_image_service_error(self, mock_service, client, sample_image_file):
         """Test upload with service error"""
         # Mock service error
-        mock_service.upload_image.return_value = {
+        mock_service.upload_image_stream.return_value = {
             "success": False,
             "error": "Service error",
         }
@@ -98,28 +158,51 @@ class TestMainAPI:
             "detail", response_data.get("message", "")
         )
 
-    @patch("src.main.image_service")
+    def test_upload_image_storage_failure(
+        self, mock_service, client, sample_image_file
+    ):
+        """Test a failed storage step is reported as a server error"""
+        mock_service.upload_image_stream.return_value = {
+            "success": False,
+            "error": "Failed to upload image to storage",
+            "error_code": "internal_error",
+        }
+
+        filename, file_content, content_type = sample_image_file
+
+        response = client.post(
+            "/images",
+            files={"file": (filename, file_content, content_type)},
+            data={"user_id": "user123"},
+        )
+
+        assert response.status_code == 500
+        response_data = response.json()
+        assert "Failed to upload image to storage" in response_data.get(
+            "detail", response_data.get("message", "")
+        )
+
+    def test_list_images_service_failure(self, mock_service, client):
+        """Test listing failures map to the status of their error code"""
+        mock_service.list_images.return_value = {
+            "success": False,
+            "error": "Internal server error",
+            "error_code": "internal_error",
+        }
+        assert client.get("/images").status_code == 500
+
+        mock_service.list_images.return_value = {
+            "success": False,
+            "error": "Invalid page token",
+            "error_code": "bad_request",
+        }
+        assert client.get("/tags/nature/images").status_code == 400
+
     def test_list_images_success(self, mock_service, client):
         """Test successful image listing"""
         mock_service.list_images.return_value = {
             "success": True,
-            "images": [
-                {
-                    "image_id": "img1",
-                    "user_id": "user123",
-                    "title": "Test Image",
-                    "description": "Test description",
-                    "tags": ["test", "sample"],
-                    "created_at": "2023-01-01T00:00:00",
-                    "file_name": "test.jpg",
-                    "file_size": 12345,
-                    "content_type": "image/jpeg",
-                    "width": 200,
-                    "height": 200,
-                    "format": "jpeg",
-                    "download_url": "https://example.com/image.jpg",
-                }
-            ],
+            "images": [{**_IMAGE, "image_id": "img1"}],
             "total_count": 1,
             "next_page_token": None,
             "has_more": False,
@@ -136,26 +219,18 @@ class TestMainAPI:
         response = client.get("/images?limit=200")
         assert response.status_code == 422  # Validation error
 
-    @patch("src.main.image_service")
+    def test_list_images_invalid_page_token(self, client):
+        """Test listing with a malformed page token"""
+        response = client.get("/images", params={"page_token": "not a token!"})
+        assert response.status_code == 422  # Validation error
+
     def test_get_image_success(self, mock_service, client):
         """Test successful image retrieval"""
-        mock_service.get_image.return_value = {
-            "success": True,
-            "image": {
-                "image_id": "test123",
-                "user_id": "user123",
-                "title": "Test Image",
-                "description": "Test description",
-                "tags": ["test", "sample"],
-                "created_at": "2023-01-01T00:00:00",
-                "file_name": "test.jpg",
-                "file_size": 12345,
-                "content_type": "image/jpeg",
-                "width": 200,
-                "height": 200,
-                "format": "jpeg",
-                "download_url": "https://example.com/image.jpg",
-            },
+        mock_service.get_images.return_value = {
+            "test123": {
+                "success": True,
+                "image": _IMAGE,
+            }
         }
 
         response = client.get("/images/test123")
@@ -163,49 +238,51 @@ class TestMainAPI:
         data = response.json()
         assert data["image_id"] == "test123"
 
-    @patch("src.main.image_service")
     def test_get_image_not_found(self, mock_service, client):
         """Test get non-existent image"""
-        mock_service.get_image.return_value = {
-            "success": False,
-            "error": "Image not found",
+        mock_service.get_images.return_value = {
+            "nonexistent": {
+                "success": False,
+                "error": "Image not found",
+                "error_code": "not_found",
+            }
         }
 
         response = client.get("/images/nonexistent")
         assert response.status_code == 404
 
-    @patch("src.main.image_service")
+    def test_get_image_metadata_not_modified(self, mock_service, client):
+        """Test metadata requests revalidate with ETag / If-None-Match"""
+        mock_service.get_image.return_value = {
+            "success": True,
+            "image": _STORED_IMAGE,
+        }
+
+        first = client.get("/images/test123/metadata")
+        etag = first.headers["ETag"]
+        assert first.status_code == 200
+        assert etag.startswith('W/"')
+
+        second = client.get("/images/test123/metadata", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+
     def test_get_download_url_success(self, mock_service, client):
         """Test successful download URL generation"""
         mock_service.get_image.return_value = {
             "success": True,
-            "image": {
-                "image_id": "test123",
-                "user_id": "user123",
-                "title": "Test Image",
-                "description": "Test description",
-                "tags": ["test", "sample"],
-                "created_at": "2023-01-01T00:00:00",
-                "file_name": "test.jpg",
-                "s3_key": "images/test.jpg",
-                "content_type": "image/jpeg",
-                "width": 200,
-                "height": 200,
-                "format": "jpeg",
-                "file_size": 12345,
-            },
+            "image": _STORED_IMAGE,
         }
 
-        with patch("src.utils.s3_client.S3Client") as mock_s3_class:
-            mock_s3 = mock_s3_class.return_value
-            mock_s3.generate_presigned_url.return_value = "https://presigned-url.com"
+        mock_service.s3_client.generate_presigned_url.return_value = (
+            "https://presigned-url.com"
+        )
 
-            response = client.get("/images/test123/download")
-            assert response.status_code == 200
-            data = response.json()
-            assert data["download_url"] == "https://presigned-url.com"
+        response = client.get("/images/test123/download")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["download_url"] == "https://presigned-url.com"
 
-    @patch("src.main.image_service")
     def test_delete_image_success(self, mock_service, client):
         """Test successful image deletion"""
         mock_service.delete_image.return_value = {
@@ -219,39 +296,50 @@ class TestMainAPI:
         data = response.json()
         assert data["message"] == "Image deleted successfully"
 
-    @patch("src.main.image_service")
     def test_delete_image_unauthorized(self, mock_service, client):
         """Test unauthorized image deletion"""
         mock_service.delete_image.return_value = {
             "success": False,
             "error": "Unauthorized to delete this image",
+            "error_code": "unauthorized",
         }
 
         response = client.delete("/images/test123", headers={"X-User-Id": "wrong_user"})
         assert response.status_code == 403
 
-    @patch("src.main.image_service")
-    def test_list_user_images(self, mock_service, client):
-        """Test listing user-specific images"""
-        mock_service.list_images.return_value = {
+    def test_permanent_delete_queues_image(self, mock_service, client):
+        """Test permanent delete soft-deletes and queues the image"""
+        mock_service.delete_image.return_value = {
+            "success": False,
+            "error": "Image already deleted",
+            "error_code": "already_deleted",
+        }
+        mock_service.request_permanent_delete.return_value = {
             "success": True,
-            "images": [],
-            "total_count": 0,
-            "has_more": False,
+            "message": "Image marked for permanent deletion",
+            "image_id": "test123",
         }
 
+        response = client.delete(
+            "/images/test123/permanent",
+            headers={"X-User-Id": "user123", "Confirmation": "PERMANENT_DELETE"},
+        )
+
+        assert response.status_code == 200
+        mock_service.request_permanent_delete.assert_called_once_with(
+            image_id="test123", user_id="user123"
+        )
+
+    def test_list_user_images(self, mock_service, client):
+        """Test listing user-specific images"""
+        mock_service.list_images.return_value = _EMPTY_LIST
+
         response = client.get("/users/user123/images")
         assert response.status_code == 200
 
-    @patch("src.main.image_service")
     def test_list_images_by_tag(self, mock_service, client):
         """Test listing images by tag"""
-        mock_service.list_images.return_value = {
-            "success": True,
-            "images": [],
-            "total_count": 0,
-            "has_more": False,
-        }
+        mock_service.list_images.return_value = _EMPTY_LIST
 
         response = client.get("/tags/nature/images")
         assert response.status_code == 200
@@ -0,0 +1,30 @@
+import json
+from unittest.mock import patch
+from src.handlers.permanent_delete_worker import handler
+
+
+def _record(message_id, body):
+    return {"messageId": message_id, "body": body}
+
+
+class TestPermanentDeleteWorker:
+    """Test the SQS permanent deletion worker"""
+
+    @patch("src.handlers.permanent_delete_worker.image_service")
+    def test_reports_only_failed_messages(self, mock_service):
+        """Test partial batch failures map back to their messages"""
+        mock_service.purge_deleted_images.return_value = ["img2"]
+        event = {
+            "Records": [
+                _record("m1", json.dumps({"image_id": "img1", "user_id": "u1"})),
+                _record("m2", json.dumps({"image_id": "img2", "user_id": "u1"})),
+                _record("m3", "not json"),
+            ]
+        }
+
+        result = handler(event, None)
+
+        mock_service.purge_deleted_images.assert_called_once_with(
+            {"img1": "u1", "img2": "u1"}
+        )
+        assert result == {"batchItemFailures": [{"itemIdentifier": "m2"}]}
@@ -0,0 +1 @@
+# Scripts test package initialization
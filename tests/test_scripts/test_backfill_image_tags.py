@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import Mock
+from src.scripts.backfill_image_tags import backfill_image_tags
+
+
+class TestBackfillImageTags:
+    """Test rebuilding tag rows for existing images"""
+
+    def test_indexes_every_page(self):
+        """Test each tagged image on every scan page gets its tag rows"""
+        dynamodb_client = Mock()
+        dynamodb_client.scan_tagged_images.side_effect = [
+            {
+                "items": [
+                    {"image_id": "img1", "created_at": "t1", "tags": "a, b"},
+                    {"image_id": "img2", "created_at": "t2", "tags": " , "},
+                ],
+                "last_evaluated_key": {"image_id": "img2"},
+            },
+            {
+                "items": [{"image_id": "img3", "created_at": "t3", "tags": "c"}],
+                "last_evaluated_key": None,
+            },
+        ]
+        dynamodb_client.put_image_tags.return_value = True
+
+        assert backfill_image_tags(dynamodb_client) == 2
+
+        dynamodb_client.scan_tagged_images.assert_called_with({"image_id": "img2"})
+        assert [
+            call.args for call in dynamodb_client.put_image_tags.call_args_list
+        ] == [
+            ("img1", "t1", ["a", "b"]),
+            ("img3", "t3", ["c"]),
+        ]
+
+    def test_stops_on_write_failure(self):
+        """Test a failed write aborts the run instead of leaving gaps silently"""
+        dynamodb_client = Mock()
+        dynamodb_client.scan_tagged_images.return_value = {
+            "items": [{"image_id": "img1", "created_at": "t1", "tags": "a"}],
+            "last_evaluated_key": None,
+        }
+        dynamodb_client.put_image_tags.return_value = False
+
+        with pytest.raises(RuntimeError):
+            backfill_image_tags(dynamodb_client)
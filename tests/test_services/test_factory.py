@@ -0,0 +1,14 @@
+from src.services.factory import get_image_service
+
+
+class TestFactory:
+    """Test shared service construction"""
+
+    def test_image_service_is_shared_and_pooled(self):
+        """Test one ImageService is reused with the pooled client config"""
+        service = get_image_service()
+
+        assert get_image_service() is service
+        s3_config = service.s3_client.s3_client.meta.config
+        assert s3_config.max_pool_connections == 100
+        assert s3_config.retries["mode"] == "adaptive"
@@ -1,9 +1,36 @@
 import pytest
+import hashlib
+import uuid
+from decimal import Decimal
 from unittest.mock import Mock, patch, MagicMock
-from PIL import Image
 import io
 from src.services.image_service import ImageService
-from src.models.image_model import ImageUploadRequest
+from src.utils.dynamodb_client import DynamoDBClient
+from src.models.image_model import (
+    ImageListResponse,
+    ImageMetadata,
+    ImageResponse,
+    ImageUploadRequest,
+)
+
+
+# Stored metadata record shared by read-only tests; the service copies it
+_STORED_IMAGE = {
+    "image_id": "test123",
+    "user_id": "user123",
+    "title": "Test Image",
+    "description": "Test description",
+    "tags": ["test", "sample"],
+    "s3_key": "images/2023/01/test123.jpg",
+    "created_at": "2023-01-01T00:00:00",
+    "file_name": "test.jpg",
+    "file_size": 12345,
+    "content_type": "image/jpeg",
+    "width": 200,
+    "height": 200,
+    "format": "jpeg",
+    "is_deleted": False,
+}
 
 
 class TestImageService:
@@ -14,19 +41,25 @@ class TestImageService:
         """Create ImageService instance with mocked dependencies"""
         with patch("src.services.image_service.S3Client") as mock_s3, patch(
             "src.services.image_service.DynamoDBClient"
-        ) as mock_dynamo:
+        ) as mock_dynamo, patch("src.services.image_service.SQSClient") as mock_sqs:
             service = ImageService()
             service.s3_client = mock_s3.return_value
             service.dynamodb_client = mock_dynamo.return_value
+            service.sqs_client = mock_sqs.return_value
+            service.dynamodb_client.find_image_by_content_hash.return_value = None
             return service
 
     @pytest.fixture
-    def sample_image_bytes(self):
+    def cached_image_service(self, image_service):
+        """ImageService with the opt-in read caches switched on"""
+        image_service._image_cache.ttl_seconds = 60
+        image_service._list_cache.ttl_seconds = 60
+        return image_service
+
+    @pytest.fixture
+    def sample_image_bytes(self, sample_jpeg_bytes):
         """Create sample image bytes for testing"""
-        img = Image.new("RGB", (200, 200), color="blue")
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format="JPEG")
-        return img_bytes.getvalue()
+        return sample_jpeg_bytes
 
     @pytest.fixture
     def sample_upload_request(self):
@@ -55,6 +88,98 @@ class TestImageService:
         assert result["success"] is True
         assert "image_id" in result
         assert result["message"] == "Image uploaded successfully"
+        image_service.dynamodb_client.put_image_tags.assert_called_once()
+        assert image_service.dynamodb_client.put_image_tags.call_args.args[2] == [
+            "test",
+            "sample",
+        ]
+
+    def test_upload_image_stream_success(
+        self, image_service, sample_image_bytes, sample_upload_request
+    ):
+        """Test successful upload from a file-like object"""
+        image_service.s3_client.upload_image_stream.return_value = True
+        image_service.dynamodb_client.put_image_metadata.return_value = True
+        stream = io.BytesIO(sample_image_bytes)
+
+        result = image_service.upload_image_stream(
+            file_stream=stream,
+            filename="test.jpg",
+            upload_request=sample_upload_request,
+        )
+
+        assert result["success"] is True
+        stored = image_service.dynamodb_client.put_image_metadata.call_args.args[0]
+        assert stored["file_size"] == len(sample_image_bytes)
+        uploaded_stream = image_service.s3_client.upload_image_stream.call_args.args[0]
+        assert uploaded_stream is stream
+        image_service.s3_client.upload_image.assert_not_called()
+
+    def test_upload_image_stores_hashes(
+        self, image_service, sample_image_bytes, sample_upload_request
+    ):
+        """Test upload records content and perceptual hashes"""
+        image_service.s3_client.upload_image.return_value = True
+        image_service.dynamodb_client.put_image_metadata.return_value = True
+
+        image_service.upload_image(
+            file_content=sample_image_bytes,
+            filename="test.jpg",
+            upload_request=sample_upload_request,
+        )
+
+        stored = image_service.dynamodb_client.put_image_metadata.call_args.args[0]
+        assert stored["content_hash"] == hashlib.sha256(sample_image_bytes).hexdigest()
+        assert len(stored["perceptual_hash"]) == 16
+        image_service.dynamodb_client.find_image_by_content_hash.assert_called_once_with(
+            "user123", stored["content_hash"]
+        )
+
+    def test_upload_image_duplicate(
+        self, image_service, sample_image_bytes, sample_upload_request
+    ):
+        """Test re-uploading identical content returns the existing image"""
+        image_service.dynamodb_client.find_image_by_content_hash.return_value = {
+            "image_id": "existing-id"
+        }
+
+        result = image_service.upload_image(
+            file_content=sample_image_bytes,
+            filename="test.jpg",
+            upload_request=sample_upload_request,
+        )
+
+        assert result["success"] is True
+        assert result["image_id"] == "existing-id"
+        assert result["duplicate"] is True
+        image_service.s3_client.upload_image.assert_not_called()
+        image_service.dynamodb_client.put_image_metadata.assert_not_called()
+
+    def test_reupload_after_delete_creates_new_image(
+        self, image_service, sample_image_bytes, sample_upload_request
+    ):
+        """Test identical content uploaded again after deletion is stored as a new image"""
+        with patch("boto3.resource"):
+            dynamodb_client = DynamoDBClient()
+        # The dedupe index still holds the soft-deleted copy
+        dynamodb_client.table.query.return_value = {
+            "Items": [{"image_id": "deleted-id", "is_deleted": True}]
+        }
+        image_service.dynamodb_client = dynamodb_client
+        image_service.s3_client.upload_image.return_value = True
+
+        result = image_service.upload_image(
+            file_content=sample_image_bytes,
+            filename="test.jpg",
+            upload_request=sample_upload_request,
+        )
+
+        assert result["success"] is True
+        assert result["image_id"] != "deleted-id"
+        assert "duplicate" not in result
+        image_service.s3_client.upload_image.assert_called_once()
+        stored = dynamodb_client.table.put_item.call_args.kwargs["Item"]
+        assert stored["image_id"] == result["image_id"]
 
     def test_upload_image_invalid_extension(
         self, image_service, sample_image_bytes, sample_upload_request
@@ -116,18 +241,37 @@ class TestImageService:
 
         assert result["success"] is False
         assert "Failed to store image metadata" in result["error"]
-        # Should have attempted rollback
+        # Should have attempted rollback of both the object and the tag rows
         image_service.s3_client.delete_image.assert_called_once()
+        tag_args = image_service.dynamodb_client.put_image_tags.call_args.args
+        image_service.dynamodb_client.delete_image_tags.assert_called_once_with(
+            [{"image_id": tag_args[0], "created_at": tag_args[1], "tags": tag_args[2]}]
+        )
 
     def test_get_image_success(self, image_service):
         """Test successful image retrieval"""
         # Mock DynamoDB response
-        mock_metadata = {
+        image_service.dynamodb_client.get_image_metadata_by_id.return_value = (
+            _STORED_IMAGE
+        )
+        image_service.s3_client.generate_presigned_url.return_value = (
+            "https://presigned-url.com"
+        )
+
+        result = image_service.get_image(image_id="test123")
+
+        assert result["success"] is True
+        assert result["image"]["image_id"] == "test123"
+        assert result["image"]["download_url"] == "https://presigned-url.com"
+
+    def test_get_image_without_s3_key(self, image_service):
+        """Test callers can ask for results without the internal s3_key"""
+        image_service.dynamodb_client.get_image_metadata_by_id.return_value = {
             "image_id": "test123",
             "user_id": "user123",
             "title": "Test Image",
-            "description": "Test description",
-            "tags": ["test", "sample"],
+            "description": None,
+            "tags": "test",
             "s3_key": "images/2023/01/test123.jpg",
             "created_at": "2023-01-01T00:00:00",
             "file_name": "test.jpg",
@@ -136,20 +280,15 @@ class TestImageService:
             "width": 200,
             "height": 200,
             "format": "jpeg",
-            "is_deleted": False,
         }
-        image_service.dynamodb_client.get_image_metadata_by_id.return_value = (
-            mock_metadata
-        )
-        image_service.s3_client.generate_presigned_url.return_value = (
-            "https://presigned-url.com"
-        )
 
-        result = image_service.get_image(image_id="test123")
+        public = image_service.get_image(
+            "test123", include_download_url=False, include_s3_key=False
+        )
+        internal = image_service.get_image("test123", include_download_url=False)
 
-        assert result["success"] is True
-        assert result["image"]["image_id"] == "test123"
-        assert result["image"]["download_url"] == "https://presigned-url.com"
+        assert "s3_key" not in public["image"]
+        assert internal["image"]["s3_key"] == "images/2023/01/test123.jpg"
 
     def test_get_image_not_found(self, image_service):
         """Test image not found"""
@@ -207,6 +346,58 @@ class TestImageService:
         assert len(result["images"]) == 1
         assert result["images"][0]["image_id"] == "img1"
 
+    def test_list_images_by_single_tag_uses_tags_table(self, image_service):
+        """Test a single-tag listing queries the tags table instead of scanning"""
+        image_service.dynamodb_client.query_images_by_tag.return_value = {
+            "items": [],
+            "last_evaluated_key": None,
+            "count": 0,
+        }
+
+        result = image_service.list_images(limit=5, tags=["nature"])
+
+        assert result["success"] is True
+        image_service.dynamodb_client.query_images_by_tag.assert_called_once_with(
+            tag="nature", limit=5, last_evaluated_key=None
+        )
+        image_service.dynamodb_client.list_images.assert_not_called()
+
+    def test_list_images_normalizes_dynamodb_rows(self, image_service):
+        """Test stored rows with no tags and Decimal numbers list cleanly"""
+        image_service.dynamodb_client.list_images.return_value = {
+            "items": [
+                {
+                    "image_id": "img1",
+                    "user_id": "user123",
+                    "s3_key": "images/2023/01/img1.jpg",
+                    "created_at": "2023-01-01T00:00:00",
+                    "file_name": "img1.jpg",
+                    "file_size": Decimal("12345"),
+                    "content_type": "image/jpeg",
+                    "width": Decimal("200"),
+                    "height": Decimal("100"),
+                    "format": "jpeg",
+                    "tags": "",
+                    "title": None,
+                    "description": None,
+                    "is_deleted": False,
+                }
+            ],
+            "last_evaluated_key": None,
+            "count": 1,
+        }
+        image_service.s3_client.generate_presigned_url.return_value = (
+            "https://presigned-url.com"
+        )
+
+        image = image_service.list_images()["images"][0]
+
+        assert image["tags"] == []
+        assert image["file_size"] == 12345 and type(image["file_size"]) is int
+        assert image["download_url"] == "https://presigned-url.com"
+        assert "s3_key" not in image
+        ImageListResponse(images=[image], total_count=1)
+
     def test_delete_image_success(self, image_service):
         """Test successful image deletion"""
         mock_metadata = {
@@ -234,6 +425,7 @@ class TestImageService:
 
         assert result["success"] is False
         assert "Image not found" in result["error"]
+        assert result["error_code"] == "not_found"
 
     def test_delete_image_unauthorized(self, image_service):
         """Test deleting image by different user"""
@@ -251,6 +443,7 @@ class TestImageService:
 
         assert result["success"] is False
         assert "Unauthorized" in result["error"]
+        assert result["error_code"] == "unauthorized"
 
     def test_delete_image_already_deleted(self, image_service):
         """Test deleting already deleted image"""
@@ -268,28 +461,258 @@ class TestImageService:
 
         assert result["success"] is False
         assert "already deleted" in result["error"]
+        assert result["error_code"] == "already_deleted"
+
+    def test_list_images_with_pagination(self, image_service):
+        """Test page tokens round-trip the last evaluated key"""
+        last_key = {"image_id": "img1", "created_at": "2023-01-01T00:00:00"}
+        image_service.dynamodb_client.list_images.return_value = {
+            "items": [],
+            "last_evaluated_key": last_key,
+            "count": 0,
+        }
+
+        first = image_service.list_images()
+        token = first["next_page_token"]
+        second = image_service.list_images(page_token=token)
+
+        assert first["has_more"] is True
+        assert "=" not in token and "+" not in token and "/" not in token
+        assert second["success"] is True
+        call = image_service.dynamodb_client.list_images.call_args.kwargs
+        assert call["last_evaluated_key"] == last_key
+
+    def test_list_images_invalid_page_token(self, image_service):
+        """Test undecodable page tokens are rejected as bad requests"""
+        result = image_service.list_images(page_token="not-a-token")
+
+        assert result["success"] is False
+        assert result["error_code"] == "bad_request"
+
+    def test_get_image_not_cached_by_default(self, image_service):
+        """Test reads go to DynamoDB every time unless caching is enabled"""
+        image_service.dynamodb_client.get_image_metadata_by_id.return_value = (
+            _STORED_IMAGE
+        )
+
+        image_service.get_image(image_id="test123", include_download_url=False)
+        image_service.get_image(image_id="test123", include_download_url=False)
+
+        assert image_service.dynamodb_client.get_image_metadata_by_id.call_count == 2
+
+    def test_get_image_served_from_cache(self, cached_image_service):
+        """Test repeated reads are served from the cache"""
+        image_service = cached_image_service
+        image_service.dynamodb_client.get_image_metadata_by_id.return_value = (
+            _STORED_IMAGE
+        )
 
-    @patch("src.services.image_service.json")
-    @patch("src.services.image_service.base64")
-    def test_list_images_with_pagination(self, mock_base64, mock_json, image_service):
-        """Test image listing with pagination"""
-        # Mock page token decoding
-        mock_base64.b64decode.return_value.decode.return_value = '{"key": "value"}'
-        mock_json.loads.return_value = {"key": "value"}
+        first = image_service.get_image(image_id="test123", include_download_url=False)
+        second = image_service.get_image(image_id="test123", include_download_url=False)
+
+        assert first == second
+        image_service.dynamodb_client.get_image_metadata_by_id.assert_called_once()
+
+    def test_delete_image_invalidates_cache(self, cached_image_service):
+        """Test deleting an image drops its cached reads"""
+        image_service = cached_image_service
+        mock_metadata = dict(_STORED_IMAGE)
+        image_service.dynamodb_client.get_image_metadata_by_id.return_value = (
+            mock_metadata
+        )
+        image_service.dynamodb_client.update_image_metadata.return_value = True
 
-        mock_images = []
+        assert image_service.get_image(image_id="test123")["success"] is True
+        assert image_service.delete_image(image_id="test123", user_id="user123")[
+            "success"
+        ]
+
+        mock_metadata["is_deleted"] = True
+        result = image_service.get_image(image_id="test123")
+
+        assert result["success"] is False
+        assert "Image not found" in result["error"]
+
+    def test_upload_image_invalidates_list_cache(
+        self, cached_image_service, sample_image_bytes, sample_upload_request
+    ):
+        """Test uploading an image drops cached listings"""
+        image_service = cached_image_service
         image_service.dynamodb_client.list_images.return_value = {
-            "items": mock_images,
-            "last_evaluated_key": {"next": "page"},
+            "items": [],
+            "last_evaluated_key": None,
             "count": 0,
         }
+        image_service.s3_client.upload_image.return_value = True
+        image_service.dynamodb_client.put_image_metadata.return_value = True
 
-        # Mock encoding for next page token
-        mock_json.dumps.return_value = '{"next": "page"}'
-        mock_base64.b64encode.return_value.decode.return_value = "encoded_token"
+        image_service.list_images()
+        image_service.list_images()
+        assert image_service.dynamodb_client.list_images.call_count == 1
 
-        result = image_service.list_images(page_token="valid_token")
+        image_service.upload_image(
+            file_content=sample_image_bytes,
+            filename="test.jpg",
+            upload_request=sample_upload_request,
+        )
+        image_service.list_images()
 
-        assert result["success"] is True
-        assert result["next_page_token"] == "encoded_token"
-        assert result["has_more"] is True
+        assert image_service.dynamodb_client.list_images.call_count == 2
+
+    def test_get_images_batches_cache_misses(self, image_service):
+        """Test get_images fetches all misses in one call"""
+        metadata = {
+            "user_id": "user123",
+            "title": None,
+            "description": None,
+            "tags": "test",
+            "s3_key": "images/2023/01/img.jpg",
+            "created_at": "2023-01-01T00:00:00",
+            "file_name": "img.jpg",
+            "file_size": 12345,
+            "content_type": "image/jpeg",
+            "width": 200,
+            "height": 200,
+            "format": "jpeg",
+            "is_deleted": False,
+        }
+        image_service.dynamodb_client.get_images_metadata_by_ids.return_value = {
+            "img1": {**metadata, "image_id": "img1"},
+            "img2": {**metadata, "image_id": "img2", "is_deleted": True},
+        }
+
+        results = image_service.get_images(
+            ["img1", "img2", "img3"], include_download_url=False
+        )
+
+        assert results["img1"]["success"] is True
+        assert results["img2"]["error"] == "Image not found"
+        assert results["img3"]["error"] == "Image not found"
+        image_service.dynamodb_client.get_images_metadata_by_ids.assert_called_once_with(
+            ["img1", "img2", "img3"]
+        )
+
+    def test_request_permanent_delete_queue_failure(self, image_service):
+        """Test a failed enqueue is reported as an internal error"""
+        image_service.sqs_client.enqueue_permanent_delete.return_value = False
+
+        result = image_service.request_permanent_delete("test123", "user123")
+
+        assert result["success"] is False
+        assert result["error_code"] == "internal_error"
+
+    def test_purge_deleted_images(self, image_service):
+        """Test purging deletes only soft-deleted images of the requesting user"""
+
+        def record(image_id, user_id="user123", is_deleted=True):
+            return {
+                "image_id": image_id,
+                "created_at": "2023-01-01T00:00:00",
+                "user_id": user_id,
+                "s3_key": f"images/2023/01/{image_id}.jpg",
+                "tags": "cat,dog",
+                "is_deleted": is_deleted,
+            }
+
+        image_service.dynamodb_client.get_images_metadata_by_ids.return_value = {
+            "gone": record("gone"),
+            "s3fail": record("s3fail"),
+            "live": record("live", is_deleted=False),
+            "other": record("other", user_id="someone-else"),
+        }
+        image_service.s3_client.delete_images.return_value = [
+            "images/2023/01/s3fail.jpg"
+        ]
+        image_service.dynamodb_client.delete_images_metadata.return_value = True
+
+        failed = image_service.purge_deleted_images(
+            {
+                "gone": "user123",
+                "s3fail": "user123",
+                "live": "user123",
+                "other": "user123",
+                "purged": "user123",
+            }
+        )
+
+        assert failed == ["s3fail"]
+        image_service.s3_client.delete_images.assert_called_once_with(
+            ["images/2023/01/gone.jpg", "images/2023/01/s3fail.jpg"]
+        )
+        image_service.dynamodb_client.delete_images_metadata.assert_called_once_with(
+            [{"image_id": "gone", "created_at": "2023-01-01T00:00:00"}]
+        )
+        image_service.dynamodb_client.delete_image_tags.assert_called_once_with(
+            [
+                {
+                    "image_id": "gone",
+                    "created_at": "2023-01-01T00:00:00",
+                    "tags": ["cat", "dog"],
+                }
+            ]
+        )
+
+    def test_purge_reads_past_stale_replicas(self, image_service):
+        """Test purging sees a soft delete an eventually consistent read misses"""
+        record = {
+            "image_id": "img1",
+            "created_at": "2023-01-01T00:00:00",
+            "user_id": "user123",
+            "s3_key": "images/2023/01/img1.jpg",
+            "tags": "",
+        }
+
+        def lookup(image_ids, consistent=False):
+            # A lagging replica has not seen the soft delete yet
+            return {"img1": {**record, "is_deleted": consistent}}
+
+        image_service.dynamodb_client.get_images_metadata_by_ids.side_effect = lookup
+        image_service.s3_client.delete_images.return_value = []
+        image_service.dynamodb_client.delete_images_metadata.return_value = True
+
+        assert image_service.purge_deleted_images({"img1": "user123"}) == []
+        image_service.s3_client.delete_images.assert_called_once_with(
+            ["images/2023/01/img1.jpg"]
+        )
+
+    def test_stored_metadata_covers_response_fields(self):
+        """Test model_construct can rely on stored records having every field"""
+        computed = {"download_url", "thumbnail_url"}
+        assert set(ImageResponse.model_fields) - computed <= set(
+            ImageMetadata.model_fields
+        )
+
+    def test_new_image_ids_are_uuid4(self, sample_upload_request):
+        """Test generated image IDs are canonical version 4 UUID strings"""
+        metadata = ImageMetadata.create_new(
+            upload_request=sample_upload_request,
+            file_name="a.jpg",
+            file_size=2048,
+            content_type="image/jpeg",
+            width=1,
+            height=1,
+            format="JPEG",
+        )
+
+        parsed = uuid.UUID(metadata.image_id)
+        assert str(parsed) == metadata.image_id
+        assert parsed.version == 4
+        assert parsed.variant == uuid.RFC_4122
+        assert metadata.s3_key.endswith(f"/{metadata.image_id}.jpeg")
+
+    def test_dynamo_item_matches_model_dump(self, image_service, sample_upload_request):
+        """Test the hand-built DynamoDB item stays in step with ImageMetadata"""
+        metadata = ImageMetadata.create_new(
+            upload_request=sample_upload_request,
+            file_name="a.jpg",
+            file_size=2048,
+            content_type="image/jpeg",
+            width=1,
+            height=1,
+            format="jpeg",
+            content_hash="ab" * 32,
+        )
+
+        expected = metadata.model_dump()
+        expected["tags"] = "test,sample"
+        assert image_service._convert_metadata_to_dynamo_format(metadata) == expected
@@ -0,0 +1,70 @@
+import asyncio
+from src.utils.batch_loader import BatchLoader
+
+
+class TestBatchLoader:
+    """Test BatchLoader class"""
+
+    def test_concurrent_loads_are_batched(self):
+        """Test loads issued together are resolved by one batch call"""
+        batches = []
+
+        def batch_fn(keys):
+            batches.append(list(keys))
+            return {key: key.upper() for key in keys}
+
+        loader = BatchLoader(batch_fn)
+
+        async def scenario():
+            return await asyncio.gather(
+                loader.load("a"), loader.load("b"), loader.load("a")
+            )
+
+        assert asyncio.run(scenario()) == ["A", "B", "A"]
+        assert batches == [["a", "b"]]
+
+    def test_batches_respect_max_size(self):
+        """Test large bursts are split into max_batch_size chunks"""
+        batches = []
+
+        def batch_fn(keys):
+            batches.append(list(keys))
+            return {key: key for key in keys}
+
+        loader = BatchLoader(batch_fn, max_batch_size=2)
+
+        async def scenario():
+            return await asyncio.gather(*(loader.load(i) for i in range(5)))
+
+        assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+        assert batches == [[0, 1], [2, 3], [4]]
+
+    def test_batch_errors_reach_every_caller(self):
+        """Test a failing batch raises for all of its callers"""
+
+        def batch_fn(keys):
+            raise ValueError("boom")
+
+        loader = BatchLoader(batch_fn)
+
+        async def scenario():
+            return await asyncio.gather(
+                loader.load("a"), loader.load("b"), return_exceptions=True
+            )
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(result, ValueError) for result in results)
+
+    def test_loader_survives_event_loop_change(self):
+        """Test keys left pending on a closed loop do not block a new loop"""
+        loader = BatchLoader(lambda keys: {key: key.upper() for key in keys})
+
+        async def abandoned():
+            asyncio.get_running_loop().create_task(loader.load("a"))
+            await asyncio.sleep(0)
+
+        async def scenario():
+            return await asyncio.wait_for(loader.load("a"), timeout=1)
+
+        asyncio.run(abandoned())
+        assert asyncio.run(scenario()) == "A"
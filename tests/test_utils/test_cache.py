@@ -0,0 +1,53 @@
+from unittest.mock import patch
+from src.utils.cache import TTLCache
+
+
+class TestTTLCache:
+    """Test TTLCache class"""
+
+    def test_get_and_set(self):
+        """Test stored values are returned"""
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        assert cache.get("missing") is None
+
+    def test_expired_entries_are_dropped(self):
+        """Test entries are not returned after their TTL"""
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        with patch("src.utils.cache.time.monotonic", return_value=1000.0):
+            cache.set("key", "value")
+        with patch("src.utils.cache.time.monotonic", return_value=1061.0):
+            assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test the cache never grows past max_entries"""
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_disabled_cache_stores_nothing(self):
+        """Test a zero TTL disables caching"""
+        cache = TTLCache(max_entries=10, ttl_seconds=0)
+        cache.set("key", "value")
+        assert cache.get("key") is None
+
+    def test_delete_where(self):
+        """Test predicate-based invalidation"""
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        cache.set(("img1", True), 1)
+        cache.set(("img1", False), 2)
+        cache.set(("img2", True), 3)
+
+        cache.delete_where(lambda key: key[0] == "img1")
+
+        assert cache.get(("img1", True)) is None
+        assert cache.get(("img1", False)) is None
+        assert cache.get(("img2", True)) == 3
@@ -0,0 +1,56 @@
+import pytest
+import os
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+from src.utils.cdn_client import CDNClient, SIGNATURE_WINDOW_SECONDS
+
+
+@pytest.fixture
+def cdn_env():
+    """CloudFront settings with a throwaway RSA key"""
+    rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+    from cryptography.hazmat.primitives import serialization
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+    with patch.dict(
+        os.environ,
+        {
+            "CLOUDFRONT_DOMAIN": "cdn.example.com",
+            "CLOUDFRONT_KEY_PAIR_ID": "K123",
+            "CLOUDFRONT_PRIVATE_KEY": pem,
+        },
+    ):
+        yield
+
+
+class TestCDNClient:
+    """Test CloudFront URL signing"""
+
+    def test_disabled_without_configuration(self):
+        """Test signing is off unless CloudFront is configured"""
+        client = CDNClient()
+
+        assert client.enabled is False
+        assert client.generate_signed_url("images/a.jpg") is None
+
+    def test_signed_url_is_bucketed_and_cached(self, cdn_env):
+        """Test requests in the same window share one signed URL"""
+        client = CDNClient()
+
+        with patch("src.utils.cdn_client.time.time", return_value=1_700_000_000.0):
+            first = client.generate_signed_url("images/2024/01/a.jpg", expiration=3600)
+            second = client.generate_signed_url("images/2024/01/a.jpg", expiration=3601)
+
+        parsed = urlparse(first)
+        query = parse_qs(parsed.query)
+        assert parsed.netloc == "cdn.example.com"
+        assert parsed.path == "/images/2024/01/a.jpg"
+        assert query["Key-Pair-Id"] == ["K123"]
+        assert int(query["Expires"][0]) % SIGNATURE_WINDOW_SECONDS == 0
+        assert second is first
@@ -0,0 +1,235 @@
+import sys
+import pytest
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+from src.models.image_model import ImageResponse
+from src.utils.dynamodb_client import (
+    LIST_ATTRIBUTE_NAMES,
+    LIST_ATTRIBUTES,
+    LIST_PROJECTION,
+    DynamoDBClient,
+)
+
+
+class TestDynamoDBClient:
+    """Test DynamoDBClient class"""
+
+    @pytest.fixture
+    def dynamodb_client(self, mock_aws_services):
+        """Create DynamoDBClient with a mocked boto3 resource"""
+        return DynamoDBClient()
+
+    def test_client_config_is_pooled(self):
+        """Test the resource keeps pooled keep-alive connections by default"""
+        config = DynamoDBClient().dynamodb.meta.client.meta.config
+
+        assert config.tcp_keepalive is True
+        assert config.max_pool_connections == 50
+
+    def test_reads_use_table_without_dax(self, dynamodb_client):
+        """Test reads go to DynamoDB when DAX is not configured"""
+        assert dynamodb_client.read_table is dynamodb_client.table
+
+    def test_reads_use_dax_when_configured(self, mock_aws_services):
+        """Test reads go through DAX while writes stay on DynamoDB"""
+        amazondax = MagicMock()
+        dax_table = amazondax.AmazonDaxClient.resource.return_value.Table.return_value
+        dax_table.query.return_value = {"Items": [{"image_id": "img1"}]}
+
+        with patch.dict(sys.modules, {"amazondax": amazondax}), patch.dict(
+            "os.environ", {"DAX_ENDPOINT": "dax://cluster.example.com"}
+        ):
+            client = DynamoDBClient()
+
+        assert client.get_image_metadata_by_id("img1") == {"image_id": "img1"}
+        assert client.put_image_metadata({"image_id": "img1"}) is True
+        dax_table.query.assert_called_once()
+        dax_table.put_item.assert_not_called()
+        client.table.put_item.assert_called_once()
+
+    def test_state_checks_bypass_dax(self, mock_aws_services):
+        """Test dedupe and consistent lookups read DynamoDB even with DAX configured"""
+        amazondax = MagicMock()
+        dax_table = amazondax.AmazonDaxClient.resource.return_value.Table.return_value
+
+        with patch.dict(sys.modules, {"amazondax": amazondax}), patch.dict(
+            "os.environ", {"DAX_ENDPOINT": "dax://cluster.example.com"}
+        ):
+            client = DynamoDBClient()
+        client.table.query.return_value = {"Items": [{"image_id": "img1"}]}
+
+        assert client.find_image_by_content_hash("user123", "abc") == {
+            "image_id": "img1"
+        }
+        assert client.get_image_metadata_by_id("img1", consistent=True) == {
+            "image_id": "img1"
+        }
+        dax_table.query.assert_not_called()
+        assert client.table.query.call_args.kwargs["ConsistentRead"] is True
+
+    def test_get_images_metadata_by_ids(self, dynamodb_client):
+        """Test batch lookups use one PartiQL statement per chunk"""
+        client = dynamodb_client.dynamodb.meta.client
+        client.execute_statement.return_value = {
+            "Items": [
+                {"image_id": {"S": "img1"}, "file_size": {"N": "12345"}},
+                {"image_id": {"S": "img2"}, "file_size": {"N": "678"}},
+            ]
+        }
+
+        result = dynamodb_client.get_images_metadata_by_ids(["img1", "img2"])
+
+        assert result["img1"]["file_size"] == 12345
+        assert set(result) == {"img1", "img2"}
+        call = client.execute_statement.call_args.kwargs
+        assert "IN [?, ?]" in call["Statement"]
+        assert call["Parameters"] == [{"S": "img1"}, {"S": "img2"}]
+        assert call["ConsistentRead"] is False
+
+        dynamodb_client.get_images_metadata_by_ids(["img1"], consistent=True)
+        assert client.execute_statement.call_args.kwargs["ConsistentRead"] is True
+
+    def test_batched_reads_use_dax_when_configured(self, mock_aws_services):
+        """Test small ID batches go through DAX unless consistency is required"""
+        amazondax = MagicMock()
+        dax_table = amazondax.AmazonDaxClient.resource.return_value.Table.return_value
+        dax_table.query.side_effect = lambda **kwargs: {
+            "Items": [{"image_id": "img1"}] if dax_table.query.call_count == 1 else []
+        }
+
+        with patch.dict(sys.modules, {"amazondax": amazondax}), patch.dict(
+            "os.environ", {"DAX_ENDPOINT": "dax://cluster.example.com"}
+        ):
+            client = DynamoDBClient()
+        base_client = client.dynamodb.meta.client
+        base_client.execute_statement.return_value = {"Items": []}
+
+        assert client.get_images_metadata_by_ids(["img1", "img2"]) == {
+            "img1": {"image_id": "img1"}
+        }
+        assert dax_table.query.call_count == 2
+        base_client.execute_statement.assert_not_called()
+
+        client.get_images_metadata_by_ids(["img1"], consistent=True)
+        client.get_images_metadata_by_ids([f"img{i}" for i in range(11)])
+        assert dax_table.query.call_count == 2
+        assert base_client.execute_statement.call_count == 2
+
+    def test_list_images_tags_match_exactly(self, dynamodb_client):
+        """Test tag filters on the scan path do not match tag substrings"""
+        dynamodb_client.table.scan.return_value = {
+            "Items": [
+                {"image_id": "img1", "tags": "bobcat,hotdog"},
+                {"image_id": "img2", "tags": "cat, bird"},
+                {"image_id": "img3", "tags": "dog"},
+            ],
+            "Count": 3,
+        }
+
+        result = dynamodb_client.list_images(user_id="user1", tags=["cat", "dog"])
+
+        assert [item["image_id"] for item in result["items"]] == ["img2", "img3"]
+        assert result["count"] == 2
+
+    def test_list_images_filter_expression(self, dynamodb_client):
+        """Test user and tag filters are combined into one scan expression"""
+        dynamodb_client.table.scan.return_value = {"Items": [], "Count": 0}
+
+        dynamodb_client.list_images(limit=5, user_id="user1", tags=["cat", "dog"])
+
+        call = dynamodb_client.table.scan.call_args.kwargs
+        assert call["FilterExpression"] == (
+            "#user_id = :user_id AND "
+            "(contains(#tags, :tag0) OR contains(#tags, :tag1))"
+        )
+        assert call["ProjectionExpression"] == LIST_PROJECTION
+        assert call["ExpressionAttributeNames"] == LIST_ATTRIBUTE_NAMES
+        assert call["ExpressionAttributeValues"] == {
+            ":user_id": "user1",
+            ":tag0": "cat",
+            ":tag1": "dog",
+        }
+
+    def test_scan_tagged_images(self, dynamodb_client):
+        """Test the backfill scan reads live tagged images from DynamoDB"""
+        dynamodb_client.table.scan.return_value = {
+            "Items": [{"image_id": "img1", "created_at": "t1", "tags": "a"}],
+            "LastEvaluatedKey": {"image_id": "img1"},
+        }
+
+        page = dynamodb_client.scan_tagged_images({"image_id": "img0"})
+
+        scan_kwargs = dynamodb_client.table.scan.call_args.kwargs
+        assert scan_kwargs["ExclusiveStartKey"] == {"image_id": "img0"}
+        assert "attribute_not_exists(#is_deleted)" in scan_kwargs["FilterExpression"]
+        assert page["items"] == [{"image_id": "img1", "created_at": "t1", "tags": "a"}]
+        assert page["last_evaluated_key"] == {"image_id": "img1"}
+
+    def test_query_images_by_tag(self, dynamodb_client):
+        """Test tag listings query the tags table and fetch records in order"""
+        dynamodb_client.read_tags_table.query.return_value = {
+            "Items": [
+                {"image_id": "img2", "created_at": "2023-01-02T00:00:00"},
+                {"image_id": "img1", "created_at": "2023-01-01T00:00:00"},
+            ],
+            "LastEvaluatedKey": {"tag": "cat", "sort_key": "x"},
+        }
+        dynamodb_client.read_resource.batch_get_item.return_value = {
+            "Responses": {
+                dynamodb_client.table_name: [{"image_id": "img1"}, {"image_id": "img2"}]
+            }
+        }
+
+        result = dynamodb_client.query_images_by_tag("cat", limit=2)
+
+        assert [item["image_id"] for item in result["items"]] == ["img2", "img1"]
+        assert result["last_evaluated_key"] == {"tag": "cat", "sort_key": "x"}
+        request = dynamodb_client.read_resource.batch_get_item.call_args.kwargs
+        assert request["RequestItems"][dynamodb_client.table_name]["Keys"] == [
+            {"image_id": "img2", "created_at": "2023-01-02T00:00:00"},
+            {"image_id": "img1", "created_at": "2023-01-01T00:00:00"},
+        ]
+
+    def test_batch_get_backs_off_on_unprocessed_keys(self, dynamodb_client):
+        """Test unprocessed keys are retried after a delay, then fail the lookup"""
+        table_name = dynamodb_client.table_name
+        keys = [{"image_id": "img1", "created_at": "2023-01-01T00:00:00"}]
+        unprocessed = {table_name: {"Keys": keys}}
+        batch_get_item = dynamodb_client.read_resource.batch_get_item
+        batch_get_item.side_effect = [
+            {"Responses": {}, "UnprocessedKeys": unprocessed},
+            {"Responses": {table_name: [{"image_id": "img1"}]}},
+        ]
+
+        with patch("src.utils.dynamodb_client.time.sleep") as sleep:
+            assert dynamodb_client._batch_get_images(keys) == {
+                "img1": {"image_id": "img1"}
+            }
+        sleep.assert_called_once()
+        assert 0 <= sleep.call_args.args[0] <= 0.1
+
+        batch_get_item.reset_mock()
+        batch_get_item.side_effect = None
+        batch_get_item.return_value = {"Responses": {}, "UnprocessedKeys": unprocessed}
+        with patch("src.utils.dynamodb_client.time.sleep") as sleep:
+            with pytest.raises(RuntimeError):
+                dynamodb_client._batch_get_images(keys)
+        assert batch_get_item.call_count == 5
+        assert sleep.call_count == 4
+
+    def test_list_projection_covers_response_fields(self):
+        """Test projected list rows still carry every ImageResponse field"""
+        computed = {"download_url", "thumbnail_url"}
+        assert set(ImageResponse.model_fields) - computed <= set(LIST_ATTRIBUTES)
+        assert {"s3_key", "is_deleted"} <= set(LIST_ATTRIBUTES)
+
+    def test_put_image_metadata_does_not_overwrite(self, dynamodb_client):
+        """Test new records are written conditionally and collisions fail"""
+        dynamodb_client.table.put_item.side_effect = ClientError(
+            {"Error": {"Code": "ConditionalCheckFailedException", "Message": ""}},
+            "PutItem",
+        )
+
+        assert dynamodb_client.put_image_metadata({"image_id": "img1"}) is False
+        call = dynamodb_client.table.put_item.call_args.kwargs
+        assert call["ConditionExpression"] == "attribute_not_exists(image_id)"
@@ -0,0 +1,42 @@
+import hashlib
+import io
+from PIL import Image
+from src.utils.image_hash import average_hash, content_sha256
+
+
+def _encode(image, format):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+class TestImageHash:
+    """Test content and perceptual hashing"""
+
+    def test_content_sha256_stream_matches_bytes(self):
+        """Test streamed hashing matches hashlib and rewinds the stream"""
+        data = b"x" * (3 * 1024 * 1024 + 7)
+        stream = io.BytesIO(data)
+
+        assert content_sha256(stream) == hashlib.sha256(data).hexdigest()
+        assert content_sha256(data) == hashlib.sha256(data).hexdigest()
+        assert stream.tell() == 0
+
+    def test_average_hash_ignores_encoding(self):
+        """Test the same picture hashes equally across formats"""
+        image = Image.new("RGB", (200, 200), color="white")
+        image.paste((0, 0, 0), (0, 0, 100, 200))
+
+        jpeg_hash = average_hash(_encode(image, "JPEG"))
+        png_hash = average_hash(io.BytesIO(_encode(image, "PNG")))
+
+        assert jpeg_hash == png_hash
+        assert len(jpeg_hash) == 16
+
+    def test_average_hash_reuses_opened_image(self):
+        """Test an image opened by the validator hashes like the raw bytes"""
+        image = Image.new("RGB", (200, 200), color="white")
+        image.paste((0, 0, 0), (0, 0, 100, 200))
+        data = _encode(image, "JPEG")
+
+        assert average_hash(Image.open(io.BytesIO(data))) == average_hash(data)
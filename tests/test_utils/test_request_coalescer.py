@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import pytest
+from src.utils.request_coalescer import RequestCoalescer
+
+
+class TestRequestCoalescer:
+    """Test RequestCoalescer class"""
+
+    def test_concurrent_identical_calls_run_once(self):
+        """Test concurrent callers with the same key share one execution"""
+        coalescer = RequestCoalescer()
+        release = threading.Event()
+        calls = []
+
+        def fetch(image_id):
+            calls.append(image_id)
+            release.wait(timeout=5)
+            return {"image_id": image_id}
+
+        async def scenario():
+            first = asyncio.create_task(coalescer.run("img1", fetch, "img1"))
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(coalescer.run("img1", fetch, "img1"))
+            await asyncio.sleep(0.01)
+            release.set()
+            return await asyncio.gather(first, second)
+
+        results = asyncio.run(scenario())
+
+        assert calls == ["img1"]
+        assert results[0] is results[1]
+
+    def test_cancelled_first_caller_does_not_fail_others(self):
+        """Test later callers still get the result if the first one is cancelled"""
+        coalescer = RequestCoalescer()
+        release = threading.Event()
+        calls = []
+
+        def fetch(image_id):
+            calls.append(image_id)
+            release.wait(timeout=5)
+            return {"image_id": image_id}
+
+        async def scenario():
+            first = asyncio.create_task(coalescer.run("img1", fetch, "img1"))
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(coalescer.run("img1", fetch, "img1"))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            await asyncio.sleep(0.01)
+            release.set()
+            return first, await second
+
+        first, result = asyncio.run(scenario())
+
+        assert first.cancelled()
+        assert result == {"image_id": "img1"}
+        assert calls == ["img1"]
+
+    def test_different_keys_run_separately(self):
+        """Test callers with different keys are not coalesced"""
+        coalescer = RequestCoalescer()
+
+        async def scenario():
+            return await asyncio.gather(
+                coalescer.run("a", str.upper, "a"), coalescer.run("b", str.upper, "b")
+            )
+
+        assert asyncio.run(scenario()) == ["A", "B"]
+
+    def test_errors_propagate_and_clear_inflight(self):
+        """Test failures reach the caller and do not poison later calls"""
+        coalescer = RequestCoalescer()
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            asyncio.run(coalescer.run("key", fail))
+
+        assert asyncio.run(coalescer.run("key", str.upper, "ok")) == "OK"
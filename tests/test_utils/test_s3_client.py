@@ -0,0 +1,90 @@
+import pytest
+import os
+from datetime import datetime, timezone
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+from src.utils.s3_client import S3Client, PRESIGN_WINDOW_SECONDS
+
+FROZEN_NOW = datetime(2024, 1, 15, 12, 30, 45, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def frozen_time():
+    """Pin the clock seen by botocore's signer and the presign cache"""
+    with patch("botocore.auth.datetime") as botocore_datetime, patch(
+        "src.utils.s3_client.time.time", return_value=FROZEN_NOW.timestamp()
+    ):
+        botocore_datetime.datetime.utcnow.return_value = FROZEN_NOW.replace(tzinfo=None)
+        yield
+
+
+class TestPresignedUrls:
+    """Test direct SigV4 presigning against botocore's signer"""
+
+    @pytest.mark.parametrize(
+        "key", ["images/2024/01/abc.jpg", "images/2024/01/a b+c~é.png"]
+    )
+    def test_matches_botocore(self, frozen_time, key):
+        """Test the fast path produces botocore's URL byte for byte"""
+        client = S3Client()
+
+        assert client._fast_presign(key, 900, FROZEN_NOW) == client._botocore_presign(
+            key, 900
+        )
+
+    def test_matches_botocore_with_session_token(self, frozen_time):
+        """Test temporary credentials carry their security token"""
+        with patch.dict(
+            os.environ,
+            {
+                "AWS_ENDPOINT_URL": "https://s3.amazonaws.com",
+                "S3_PUBLIC_ENDPOINT_URL": "https://s3.amazonaws.com",
+            },
+        ):
+            client = S3Client()
+        client.s3_client._request_signer._credentials.token = "TOK/+="
+
+        url = client._fast_presign("images/a.jpg", 3600, FROZEN_NOW)
+
+        assert "X-Amz-Security-Token=TOK%2F%2B%3D" in url
+        assert url == client._botocore_presign("images/a.jpg", 3600)
+
+    def test_signs_for_public_endpoint(self, frozen_time):
+        """Test URLs are signed for the host clients will actually request"""
+        with patch.dict(os.environ, {"AWS_ENDPOINT_URL": "http://localstack:4566"}):
+            client = S3Client()
+
+        url = client.generate_presigned_url("images/a.jpg")
+
+        assert url.startswith("http://localhost:4566/")
+        with patch.dict(os.environ, {"AWS_ENDPOINT_URL": "http://localhost:4566"}):
+            assert url == S3Client().generate_presigned_url("images/a.jpg")
+
+    def test_reuses_url_within_window(self, frozen_time):
+        """Test one signature is shared per window and still covers expiration"""
+        client = S3Client()
+
+        with patch.object(
+            client, "_fast_presign", wraps=client._fast_presign
+        ) as fast_presign:
+            url = client.generate_presigned_url("images/a.jpg", 3600)
+            assert client.generate_presigned_url("images/a.jpg", 3600) == url
+
+        fast_presign.assert_called_once()
+        query = parse_qs(urlparse(url).query)
+        signed_at = datetime.strptime(query["X-Amz-Date"][0], "%Y%m%dT%H%M%SZ").replace(
+            tzinfo=timezone.utc
+        )
+        valid_until = signed_at.timestamp() + int(query["X-Amz-Expires"][0])
+        assert signed_at <= FROZEN_NOW
+        assert valid_until >= FROZEN_NOW.timestamp() + 3600
+        assert valid_until <= FROZEN_NOW.timestamp() + 3600 + PRESIGN_WINDOW_SECONDS
+
+    def test_falls_back_without_credentials(self):
+        """Test botocore signing is used when the fast path is unavailable"""
+        client = S3Client()
+
+        with patch.object(client.s3_client, "_get_credentials", return_value=None):
+            url = client.generate_presigned_url("images/a.jpg")
+
+        assert "X-Amz-Signature=" in url
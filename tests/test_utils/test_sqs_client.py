@@ -0,0 +1,18 @@
+import json
+from src.utils.sqs_client import SQSClient
+
+
+class TestSQSClient:
+    """Test SQSClient class"""
+
+    def test_client_created_on_first_send(self, mock_aws_services):
+        """Test the boto3 client is only built when a message is sent"""
+        client = SQSClient()
+        mock_aws_services["client"].assert_not_called()
+
+        assert client.enqueue_permanent_delete("img1", "user1") is True
+        assert client.enqueue_permanent_delete("img2", "user1") is True
+
+        mock_aws_services["client"].assert_called_once()
+        sent = client.sqs_client.send_message.call_args.kwargs
+        assert json.loads(sent["MessageBody"])["image_id"] == "img2"
@@ -1,73 +1,115 @@
 import pytest
+from unittest.mock import patch
 from src.utils.validators import ImageValidator, MetadataValidator, QueryValidator
-from PIL import Image
 import io
 
 
+# Values at the metadata limits, built once for the whole module
+_TITLE_MAX = "A" * MetadataValidator.MAX_TITLE_LENGTH
+_DESC_MAX = "A" * MetadataValidator.MAX_DESCRIPTION_LENGTH
+_TAG_MAX = "a" * MetadataValidator.MAX_TAG_LENGTH
+_TAGS_OVERFLOW = [""] * (MetadataValidator.MAX_TAGS_COUNT + 1)
+
+
 class TestImageValidator:
     """Test ImageValidator class"""
 
-    def test_validate_file_extension_valid(self):
-        """Test valid file extensions"""
-        valid_extensions = [
+    @pytest.mark.parametrize(
+        "filename",
+        [
             "image.jpg",
             "image.jpeg",
             "image.png",
             "image.gif",
             "image.webp",
-        ]
-        for filename in valid_extensions:
-            assert ImageValidator.validate_file_extension(filename) is True
+            "IMAGE.JPG",
+            "archive.tar.png",
+        ],
+    )
+    def test_validate_file_extension_valid(self, filename):
+        """Test valid file extensions"""
+        assert ImageValidator.validate_file_extension(filename) is True
 
-    def test_validate_file_extension_invalid(self):
+    @pytest.mark.parametrize(
+        "filename",
+        [
+            "image.txt",
+            "image.pdf",
+            "image.doc",
+            "noextension",
+            "jpg",
+            "image.",
+            "",
+        ],
+    )
+    def test_validate_file_extension_invalid(self, filename):
         """Test invalid file extensions"""
-        invalid_extensions = ["image.txt", "image.pdf", "image.doc", "noextension", ""]
-        for filename in invalid_extensions:
-            assert ImageValidator.validate_file_extension(filename) is False
+        assert ImageValidator.validate_file_extension(filename) is False
 
-    def test_validate_mime_type_valid(self):
-        """Test valid MIME types"""
-        valid_types = [
+    @pytest.mark.parametrize(
+        "mime_type",
+        [
             "image/jpeg",
             "image/jpg",
             "image/png",
             "image/gif",
             "image/webp",
-        ]
-        for mime_type in valid_types:
-            assert ImageValidator.validate_mime_type(mime_type) is True
+        ],
+    )
+    def test_validate_mime_type_valid(self, mime_type):
+        """Test valid MIME types"""
+        assert ImageValidator.validate_mime_type(mime_type) is True
 
-    def test_validate_mime_type_invalid(self):
+    @pytest.mark.parametrize(
+        "mime_type", ["text/plain", "application/pdf", "video/mp4", ""]
+    )
+    def test_validate_mime_type_invalid(self, mime_type):
         """Test invalid MIME types"""
-        invalid_types = ["text/plain", "application/pdf", "video/mp4", ""]
-        for mime_type in invalid_types:
-            assert ImageValidator.validate_mime_type(mime_type) is False
+        assert ImageValidator.validate_mime_type(mime_type) is False
 
-    def test_validate_file_size_valid(self):
+    @pytest.mark.parametrize(
+        "size",
+        [1024, 5 * 1024 * 1024, 10 * 1024 * 1024],  # 1KB, 5MB, 10MB
+    )
+    def test_validate_file_size_valid(self, size):
         """Test valid file sizes"""
-        valid_sizes = [1024, 5 * 1024 * 1024, 10 * 1024 * 1024]  # 1KB, 5MB, 10MB
-        for size in valid_sizes:
-            assert ImageValidator.validate_file_size(size) is True
+        assert ImageValidator.validate_file_size(size) is True
 
-    def test_validate_file_size_invalid(self):
+    @pytest.mark.parametrize(
+        "size",
+        [500, 11 * 1024 * 1024],  # 500B, 11MB
+    )
+    def test_validate_file_size_invalid(self, size):
         """Test invalid file sizes"""
-        invalid_sizes = [500, 11 * 1024 * 1024]  # 500B, 11MB
-        for size in invalid_sizes:
-            assert ImageValidator.validate_file_size(size) is False
-
-    def test_validate_image_content_valid(self):
-        """Test valid image content"""
-        # Create a test image
-        img = Image.new("RGB", (100, 100), color="red")
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format="JPEG")
-        img_bytes = img_bytes.getvalue()
+        assert ImageValidator.validate_file_size(size) is False
+
+    @pytest.mark.parametrize(
+        "size, valid, error",
+        [
+            pytest.param((100, 100), True, None, id="100x100"),
+            pytest.param((30, 30), False, "dimensions", id="too-small"),
+        ],
+    )
+    def test_validate_image_content_jpeg(self, encoded_image, size, valid, error):
+        """Test JPEG content is accepted within the size limits and rejected outside"""
+        result = ImageValidator.validate_image_content(
+            encoded_image(size, "red", "JPEG")
+        )
+        assert result["valid"] is valid
+        if valid:
+            assert (result["width"], result["height"]) == size
+            assert result["format"] == "jpeg"
+        else:
+            assert error in result["error"]
+
+    def test_validate_image_content_file_object(self, encoded_image):
+        """Test image content can be validated from a file-like object"""
+        img_bytes = io.BytesIO(encoded_image((100, 100), "red", "PNG"))
 
         result = ImageValidator.validate_image_content(img_bytes)
         assert result["valid"] is True
-        assert result["width"] == 100
-        assert result["height"] == 100
-        assert result["format"] == "jpeg"
+        assert result["format"] == "png"
+        assert img_bytes.tell() == 0
 
     def test_validate_image_content_invalid(self):
         """Test invalid image content"""
@@ -76,118 +118,148 @@ class TestImageValidator:
         assert result["valid"] is False
         assert "error" in result
 
-    def test_validate_image_content_dimensions_too_small(self):
-        """Test image with dimensions too small"""
-        img = Image.new("RGB", (30, 30), color="red")
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format="JPEG")
-        img_bytes = img_bytes.getvalue()
+    def test_validate_image_content_rejects_other_formats(self, encoded_image):
+        """Test formats outside the allow-list are rejected before PIL opens them"""
+        img_bytes = io.BytesIO(encoded_image((100, 100), "red", "BMP"))
+
+        with patch("src.utils.validators.Image.open") as image_open:
+            result = ImageValidator.validate_image_content(img_bytes)
+
+        assert result["valid"] is False
+        assert "unrecognized format" in result["error"]
+        image_open.assert_not_called()
+        assert img_bytes.tell() == 0
+
+    @pytest.mark.parametrize("fmt", ["PNG", "JPEG"])
+    def test_validate_image_content_rejects_size_from_header(self, encoded_image, fmt):
+        """Test PNG and JPEG sizes are checked from the header before PIL opens them"""
+        img_bytes = io.BytesIO(encoded_image((4001, 60), "red", fmt))
+
+        with patch("src.utils.validators.Image.open") as image_open:
+            result = ImageValidator.validate_image_content(img_bytes)
 
-        result = ImageValidator.validate_image_content(img_bytes)
         assert result["valid"] is False
         assert "dimensions" in result["error"]
+        image_open.assert_not_called()
+        assert img_bytes.tell() == 0
 
 
 class TestMetadataValidator:
     """Test MetadataValidator class"""
 
-    def test_validate_title_valid(self):
+    def test_parse_tags(self):
+        """Test tag string parsing"""
+        assert MetadataValidator.parse_tags(" nature ") == ["nature"]
+        assert MetadataValidator.parse_tags("   ") == []
+        assert MetadataValidator.parse_tags(" a , b,,c ,") == ["a", "b", "c"]
+        assert MetadataValidator.parse_tags("two words, x") == ["two words", "x"]
+
+    @pytest.mark.parametrize(
+        "title",
+        [None, "", "Short title", pytest.param(_TITLE_MAX, id="title-200")],
+    )
+    def test_validate_title_valid(self, title):
         """Test valid titles"""
-        valid_titles = [None, "", "Short title", "A" * 200]
-        for title in valid_titles:
-            result = MetadataValidator.validate_title(title)
-            assert result["valid"] is True
+        result = MetadataValidator.validate_title(title)
+        assert result.valid is True
 
     def test_validate_title_invalid(self):
         """Test invalid titles"""
         # Title too long
-        long_title = "A" * 201
-        result = MetadataValidator.validate_title(long_title)
-        assert result["valid"] is False
+        result = MetadataValidator.validate_title(_TITLE_MAX + "A")
+        assert result.valid is False
 
-    def test_validate_description_valid(self):
+        # Whitespace-only title
+        result = MetadataValidator.validate_title(" \t\n")
+        assert result.error == "Title cannot be empty"
+
+    @pytest.mark.parametrize(
+        "desc",
+        [None, "Short description", pytest.param(_DESC_MAX, id="desc-1000")],
+    )
+    def test_validate_description_valid(self, desc):
         """Test valid descriptions"""
-        valid_descriptions = [None, "Short description", "A" * 1000]
-        for desc in valid_descriptions:
-            result = MetadataValidator.validate_description(desc)
-            assert result["valid"] is True
+        result = MetadataValidator.validate_description(desc)
+        assert result.valid is True
 
     def test_validate_description_invalid(self):
         """Test invalid descriptions"""
         # Description too long
-        long_desc = "A" * 1001
-        result = MetadataValidator.validate_description(long_desc)
-        assert result["valid"] is False
+        result = MetadataValidator.validate_description(_DESC_MAX + "A")
+        assert result.valid is False
 
-    def test_validate_tags_valid(self):
+    @pytest.mark.parametrize(
+        "tags",
+        [None, [], ["tag1", "tag2"], pytest.param([_TAG_MAX], id="tag-50")],
+    )
+    def test_validate_tags_valid(self, tags):
         """Test valid tags"""
-        valid_tags = [None, [], ["tag1", "tag2"], ["a" * 50]]  # Max length tag
-        for tags in valid_tags:
-            result = MetadataValidator.validate_tags(tags)
-            assert result["valid"] is True
+        result = MetadataValidator.validate_tags(tags)
+        assert result.valid is True
 
-    def test_validate_tags_invalid(self):
-        """Test invalid tags"""
-        invalid_tags = [
+    @pytest.mark.parametrize(
+        "tags",
+        [
             "not a list",  # Not a list
-            [""] * 11,  # Too many tags
-            ["a" * 51],  # Tag too long
+            pytest.param(_TAGS_OVERFLOW, id="11-tags"),  # Too many tags
+            pytest.param([_TAG_MAX + "a"], id="tag-51"),  # Tag too long
             [""],  # Empty tag
+            ["  "],  # Whitespace-only tag
             ["tag with @special!"],  # Invalid characters
-        ]
-        for tags in invalid_tags:
-            result = MetadataValidator.validate_tags(tags)
-            assert result["valid"] is False
+            ["valid", "also-valid", "bad!"],  # Invalid characters in a later tag
+            ["valid", 42],  # Non-string tag
+        ],
+    )
+    def test_validate_tags_invalid(self, tags):
+        """Test invalid tags"""
+        result = MetadataValidator.validate_tags(tags)
+        assert result.valid is False
 
-    def test_validate_user_id_valid(self):
+    @pytest.mark.parametrize("user_id", ["user123", "user_123", "user-123"])
+    def test_validate_user_id_valid(self, user_id):
         """Test valid user IDs"""
-        valid_ids = ["user123", "user_123", "user-123"]
-        for user_id in valid_ids:
-            result = MetadataValidator.validate_user_id(user_id)
-            assert result["valid"] is True
+        result = MetadataValidator.validate_user_id(user_id)
+        assert result.valid is True
 
-    def test_validate_user_id_invalid(self):
+    @pytest.mark.parametrize(
+        "user_id", [None, "", "   ", "user@123", "user with spaces", "user123\n"]
+    )
+    def test_validate_user_id_invalid(self, user_id):
         """Test invalid user IDs"""
-        invalid_ids = [None, "", "   ", "user@123", "user with spaces"]
-        for user_id in invalid_ids:
-            result = MetadataValidator.validate_user_id(user_id)
-            assert result["valid"] is False
+        result = MetadataValidator.validate_user_id(user_id)
+        assert result.valid is False
 
 
 class TestQueryValidator:
     """Test QueryValidator class"""
 
-    def test_validate_limit_valid(self):
+    @pytest.mark.parametrize("limit", [1, 20, 100])
+    def test_validate_limit_valid(self, limit):
         """Test valid limits"""
-        valid_limits = [1, 20, 100]
-        for limit in valid_limits:
-            result = QueryValidator.validate_limit(limit)
-            assert result["valid"] is True
-            assert result["value"] == limit
+        result = QueryValidator.validate_limit(limit)
+        assert result.valid is True
+        assert result.value == limit
 
     def test_validate_limit_default(self):
         """Test default limit"""
         result = QueryValidator.validate_limit(None)
-        assert result["valid"] is True
-        assert result["value"] == 20
+        assert result.valid is True
+        assert result.value == 20
 
-    def test_validate_limit_invalid(self):
+    @pytest.mark.parametrize("limit", [0, 101, "not a number", -1])
+    def test_validate_limit_invalid(self, limit):
         """Test invalid limits"""
-        invalid_limits = [0, 101, "not a number", -1]
-        for limit in invalid_limits:
-            result = QueryValidator.validate_limit(limit)
-            assert result["valid"] is False
+        result = QueryValidator.validate_limit(limit)
+        assert result.valid is False
 
-    def test_validate_last_evaluated_key_valid(self):
+    @pytest.mark.parametrize("key", [None, "valid_key_string"])
+    def test_validate_last_evaluated_key_valid(self, key):
         """Test valid pagination keys"""
-        valid_keys = [None, "valid_key_string"]
-        for key in valid_keys:
-            result = QueryValidator.validate_last_evaluated_key(key)
-            assert result["valid"] is True
+        result = QueryValidator.validate_last_evaluated_key(key)
+        assert result.valid is True
 
-    def test_validate_last_evaluated_key_invalid(self):
+    @pytest.mark.parametrize("key", ["", "   "])
+    def test_validate_last_evaluated_key_invalid(self, key):
         """Test invalid pagination keys"""
-        invalid_keys = ["", "   "]
-        for key in invalid_keys:
-            result = QueryValidator.validate_last_evaluated_key(key)
-            assert result["valid"] is False
+        result = QueryValidator.validate_last_evaluated_key(key)
+        assert result.valid is False